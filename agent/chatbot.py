@@ -31,13 +31,7 @@ class ChatBot:
         )
 
     def summarize(self, info, review, query):
-        input = f"""조건: {query}
-        수업 개요와 강의평을 요약해서 이 강의가 조건에 적합한 강의인지 알려주세요.
-        조건에 대한 내용만 포함해서 요약하는 것이 중요합니다.
-        """
-        prompt_filled = self.prompt.format(
-            info=info, review=review, history=self.history, input=input
-        )
+        input, prompt_filled = self._get_summary_prompt(info, review, query)
 
         ans = self.model.invoke(prompt_filled)
 
@@ -46,6 +40,26 @@ class ChatBot:
 
         return ans.content
 
+    async def asummarize(self, info, review, query):
+        input, prompt_filled = self._get_summary_prompt(info, review, query)
+
+        ans = await self.model.ainvoke(prompt_filled)
+
+        new_interaction = f"Human: {input}\nAI: {ans.content}"
+        self.history = f"{self.history}\n\n{new_interaction}"
+
+        return ans.content
+
+    def _get_summary_prompt(self, info, review, query):
+        input = f"""조건: {query}
+        수업 개요와 강의평을 요약해서 이 강의가 조건에 적합한 강의인지 알려주세요.
+        조건에 대한 내용만 포함해서 요약하는 것이 중요합니다.
+        """
+        prompt_filled = self.prompt.format(
+            info=info, review=review, history=self.history, input=input
+        )
+        return input, prompt_filled
+
     def chat(self, info, review, query):
         prompt_filled = self.prompt.format(
             info=info, review=review, history=self.history, input=query
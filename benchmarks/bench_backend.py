@@ -0,0 +1,79 @@
+"""
+Compare the in-memory brute-force backend against the Chroma collections.
+
+Build the vector DB and its snapshot first (``python vector_db/vector_db_manager.py``),
+then run it from the repository root:
+
+    python -m benchmarks.bench_backend
+
+The Chroma collections are read through the published version pointer, the
+same way the pipeline loads them; the snapshot stores them under plain names.
+"""
+
+import time
+
+import chromadb
+import numpy as np
+
+from vector_db.embed_generator import EmbedGenerator
+from vector_db.memory_backend import SNAPSHOT_COLLECTIONS, MemoryClient
+from vector_db.versioning import VersionPointer, versioned_name
+
+CHROMA_PATH = "vector_db/chroma"
+SNAPSHOT_PATH = "vector_db/snapshot.npz"
+QUERIES = [
+    "인공지능과 관련된 수업",
+    "딥러닝 관련 내용을 배우는 수업",
+    "교수님이 학점을 잘주시는 수업",
+    "교수님이 강의력이 좋은 수업",
+]
+
+
+def timed(fn, repeat: int = 20) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    embedding_model = EmbedGenerator()
+    query_embeddings = embedding_model(QUERIES)
+
+    chroma_client = chromadb.PersistentClient(
+        path=CHROMA_PATH,
+        settings=chromadb.Settings(allow_reset=True, anonymized_telemetry=False),
+    )
+    # 버전을 사용하는 빌드는 <name>__<version> collection을 publish함
+    version = VersionPointer(CHROMA_PATH).current()
+    print(f"Chroma version: {version}")
+    clients = {
+        "chroma": chroma_client,
+        "memory-fp32": MemoryClient.from_snapshot(SNAPSHOT_PATH, dtype=np.float32),
+        "memory-fp16": MemoryClient.from_snapshot(SNAPSHOT_PATH, dtype=np.float16),
+    }
+
+    for name in SNAPSHOT_COLLECTIONS:
+        print(f"[{name}]")
+        for backend, client in clients.items():
+            collection = client.get_collection(
+                versioned_name(name, version) if backend == "chroma" else name,
+                embedding_function=embedding_model,
+            )
+            ids = collection.get(include=[])["ids"][:32]
+
+            query_ms = timed(
+                lambda: collection.query(
+                    query_embeddings=query_embeddings, n_results=256
+                )
+            )
+            get_ms = timed(lambda: collection.get(ids=ids))
+            print(
+                f"\t{backend:<12} n={collection.count():>6} "
+                f"query={query_ms:8.3f}ms get={get_ms:8.3f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
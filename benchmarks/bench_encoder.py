@@ -0,0 +1,88 @@
+"""
+Compare EmbedGenerator inference modes (fp32, int8, onnx, onnx-int8) on CPU.
+
+Each mode runs in its own process so the resident memory numbers are not
+polluted by the other models; the fp32 model that the accuracy guard loads is
+released before memory is measured. Run it from the repository root:
+
+    python -m benchmarks.bench_encoder
+"""
+
+import gc
+import json
+import subprocess
+import sys
+import time
+
+QUERIES = [
+    "인공지능과 관련된 수업",
+    "딥러닝 관련 내용을 배우는 수업",
+    "교수님이 학점을 잘주시는 수업",
+    "교수님이 강의력이 좋은 수업",
+]
+
+
+def run_mode(inference_mode: str, repeat: int = 50) -> dict:
+    import psutil
+
+    from vector_db.embed_generator import EmbedGenerator
+
+    embedding_model = EmbedGenerator(inference_mode=inference_mode)
+    encoder = embedding_model.encoder
+    encoder.encode(QUERIES)
+
+    latencies = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            encoder.encode([query])
+            latencies.append((time.perf_counter() - start) * 1e3)
+
+    # 가드에서 쓴 fp32 모델이 해제된 뒤의 상주 메모리를 측정
+    gc.collect()
+    return {
+        "mode": embedding_model.inference_mode,
+        "p50_ms": sorted(latencies)[len(latencies) // 2],
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95)],
+        "rss_mb": psutil.Process().memory_info().rss / 1024**2,
+    }
+
+
+def main():
+    from vector_db.quantization import INFERENCE_MODES
+
+    fp32_rss = None
+    for inference_mode in INFERENCE_MODES:
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_encoder", inference_mode],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            print(f"{inference_mode:<10} failed:\n{process.stderr}")
+            continue
+        output = process.stdout
+        # 가드 결과 출력은 그대로 보여주고 마지막 줄만 결과로 사용
+        *logs, result = output.strip().splitlines()
+        result = json.loads(result)
+        for line in logs:
+            print(f"\t{line}")
+        if inference_mode == "fp32":
+            fp32_rss = result["rss_mb"]
+        rss_change = (
+            f" ({(result['rss_mb'] - fp32_rss) / fp32_rss:+.0%} vs fp32)"
+            if fp32_rss
+            else ""
+        )
+        print(
+            f"{inference_mode:<10} -> {result['mode']:<10} "
+            f"p50={result['p50_ms']:7.2f}ms p95={result['p95_ms']:7.2f}ms "
+            f"rss={result['rss_mb']:7.1f}MB{rss_change}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(run_mode(sys.argv[1])))
+    else:
+        main()
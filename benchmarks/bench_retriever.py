@@ -0,0 +1,60 @@
+"""
+Micro-benchmark for ReciprocalRetriever fusion.
+
+Compares the loop-based reference (``_fuse_python``) against the vectorized
+``fuse`` on synthetic Chroma-shaped results and checks that both agree.
+Run it from the repository root:
+
+    python -m benchmarks.bench_retriever
+"""
+
+import random
+import timeit
+from typing import Any, Dict, List
+
+from recsys.retriever import ReciprocalRetriever
+
+
+def make_result(n_queries: int, k: int, n_courses: int, seed: int = 0):
+    rng = random.Random(seed)
+    result: Dict[str, List[list]] = {"ids": [], "distances": [], "metadatas": []}
+    for query_i in range(n_queries):
+        result["ids"].append([f"{query_i}-{i}" for i in range(k)])
+        result["distances"].append(sorted(rng.uniform(0.3, 0.9) for _ in range(k)))
+        result["metadatas"].append(
+            [{"course_id": str(rng.randrange(n_courses))} for _ in range(k)]
+        )
+    return result
+
+
+def main():
+    kwargs: Dict[str, Any] = {
+        "topk": 8,
+        "n_example_per_query": 4,
+        "relevance_threshold": 0.6,
+    }
+    for n_queries in (1, 3, 5, 10):
+        result = make_result(n_queries, k=256, n_courses=150, seed=n_queries)
+
+        expected = ReciprocalRetriever._fuse_python(result, **kwargs)
+        actual = ReciprocalRetriever.fuse(result, **kwargs)
+        assert tuple(expected[0]) == actual[0]
+        assert [float(score) for score in expected[1]] == list(actual[1])
+        assert {k: v for k, v in expected[2].items() if v} == dict(actual[2])
+
+        n = 200
+        loop_time = timeit.timeit(
+            lambda: ReciprocalRetriever._fuse_python(result, **kwargs), number=n
+        )
+        numpy_time = timeit.timeit(
+            lambda: ReciprocalRetriever.fuse(result, **kwargs), number=n
+        )
+        print(
+            f"n_queries={n_queries:>2} hits={256 * n_queries:>5} "
+            f"loop={loop_time / n * 1e3:.3f}ms numpy={numpy_time / n * 1e3:.3f}ms "
+            f"speedup={loop_time / numpy_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,188 +1,262 @@
 import os
 import time
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
 from db.db_manager import DBMananger
-from db.models.course import Review, ReviewStat
+from http_fetcher import AdaptiveRateLimiter
+from klue_parser import (
+    REVIEW_LIST_XPATH,
+    STAT_XPATHS,
+    KLUEParseError,
+    parse_klue_page,
+)
 
 
 class KLUECrawler:
-    def __init__(self, page_dir: str, db_path: str, skip_crawling: bool = False):
+    def __init__(
+        self,
+        page_dir: str,
+        db_path: str,
+        skip_crawling: bool = False,
+        flush_every: int = 10,
+        wait_timeout: float = 20.0,
+        max_attempts: int = 3,
+        min_delay: float = 5.0,
+        max_delay: float = 300.0,
+    ):
         self.page_dir = page_dir
         self.db_path = db_path
         self.skip_crawling = skip_crawling
-        self.db_manager = DBMananger(db_path)
+        self.db_manager = DBMananger(db_path, init_db=True)
+        # 수업마다 commit하지 않고 flush_every개씩 모아서 한 트랜잭션으로 저장
+        self.flush_every = flush_every
+        self.pending_reviews: Dict[int, List[dict]] = {}
+        self.pending_review_stats: Dict[int, dict] = {}
+        self.pending_failures: Dict[int, str] = {}
+        # 실패한 수업은 다시 실행할 때 max_attempts번까지 재시도
+        self.max_attempts = max_attempts
+        # 예전의 고정 60초 대기에서 시작해서 서버 상태에 따라 조절
+        self.rate_limiter = AdaptiveRateLimiter(
+            min_delay=min_delay, max_delay=max_delay, initial_delay=60.0
+        )
         self.courses = self.db_manager.read_courses()
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+        # 저장된 page만 다시 parsing할 때는 browser를 띄우지 않음 (crawl에서만 사용)
+        self.driver: Any = (
+            None
+            if skip_crawling
+            else webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+        )
+        self.wait: Any = (
+            None if self.driver is None else WebDriverWait(self.driver, wait_timeout)
+        )
         load_dotenv()
 
     def run(self):
         if not self.skip_crawling:
             self.crawl()
+        else:
+            self.extract_saved_pages()
 
     def crawl(self):
         self.driver.get("https://klue.kr/login")
-        self.driver.implicitly_wait(1)
-
         self.login()
-        time.sleep(3)
-
-        flag = False
-        for course in self.courses:
-            if course.course_no == "COSE401":
-                flag = True
-            if not flag:
-                continue
-            search_button = self.driver.find_element(
-                By.XPATH, '//*[@id="root"]/div/header/div/div/div[1]/a[1]'
+        # 로그인이 끝나면 header의 검색 버튼이 나타남
+        self.wait.until(EC.element_to_be_clickable((By.XPATH, SEARCH_BUTTON_XPATH)))
+
+        try:
+            self.crawl_courses()
+        finally:
+            self.flush()
+
+    def remaining_courses(self) -> list:
+        """
+        Courses not crawled yet: pending ones and failed ones with attempts left.
+        """
+        self.db_manager.init_crawl_progress([course.id for course in self.courses])
+        progress = self.db_manager.read_crawl_progress()
+        return [
+            course
+            for course in self.courses
+            if progress[course.id][0] == "pending"
+            or (
+                progress[course.id][0] == "failed"
+                and progress[course.id][1] < self.max_attempts
             )
-            search_button.click()
-            self.driver.implicitly_wait(3)
-            time.sleep(1)
+        ]
+
+    def crawl_courses(self):
+        courses = self.remaining_courses()
+        print(f"Skipping {len(self.courses) - len(courses)} finished courses")
 
-            course_no = course.course_no
-            instructor = course.instructor
-            query = course_no + " " + instructor
+        for course in courses:
+            query = course.course_no + " " + course.instructor
             print(query)
 
+            self.rate_limiter.wait()
             try:
-                self.search(query)
-                time.sleep(3)
-                reviews, review_stat = self.extract_reviews()
-
-            except NoSuchElementException:
+                elapsed = self.search(query)
+                reviews, review_stat = self.extract_reviews(query)
+            except (NoSuchElementException, KLUEParseError) as error:
+                # 검색 결과나 강의평이 없는 경우 - 서버 문제는 아님
                 print(f"No result found for {query}")
-                continue
+                self.pending_failures[course.id] = f"{type(error).__name__}: {error}"
+            except WebDriverException as error:
+                # timeout 등 서버가 느리거나 불안정한 경우 - 천천히 요청
+                print(f"Failed to crawl {query}: {type(error).__name__}")
+                self.pending_failures[course.id] = f"{type(error).__name__}: {error}"
+                self.rate_limiter.failure()
+            except Exception as error:
+                # 예상하지 못한 에러도 실패로 기록해야 재시작할 때 같은 수업에서
+                # 계속 멈추지 않고 max_attempts 이후에는 건너뜀
+                print(f"Failed to crawl {query}: {error!r}")
+                self.pending_failures[course.id] = f"{type(error).__name__}: {error}"
+            else:
+                self.rate_limiter.success(elapsed)
+                self.pending_reviews[course.id] = reviews
+                self.pending_review_stats[course.id] = review_stat
 
-            self.db_manager.add_review_to_course(course, reviews, review_stat)
+            if len(self.pending_reviews) + len(self.pending_failures) >= (
+                self.flush_every
+            ):
+                self.flush()
 
-            time.sleep(60)  # Wait due to server overload
-        # self.extract_info()
+    def flush(self):
+        if not self.pending_reviews and not self.pending_failures:
+            return
+        if self.pending_reviews:
+            self.db_manager.save_reviews(
+                self.pending_reviews, self.pending_review_stats
+            )
+            print(f"Saved reviews of {len(self.pending_reviews)} courses")
+        # 강의평을 저장한 뒤에 진행 상황을 기록해야 중간에 죽어도 빠지는 수업이 없음
+        progress: Dict[int, Tuple[str, Optional[str]]] = {
+            course_id: ("done", None) for course_id in self.pending_reviews
+        }
+        progress.update(
+            {
+                course_id: ("failed", error)
+                for course_id, error in self.pending_failures.items()
+            }
+        )
+        self.db_manager.update_crawl_progress(progress)
+        self.pending_reviews = {}
+        self.pending_review_stats = {}
+        self.pending_failures = {}
 
-    def search(self, query):
-        search_box = self.driver.find_element(
-            By.XPATH, '//*[@id="root"]/div/div/section[1]/div/div/div/input'
+    def search(self, query: str) -> float:
+        """
+        Open the course page of the first search result for ``query`` and load
+        all of its reviews. Returns how long the course page took to load.
+        """
+        self.wait.until(
+            EC.element_to_be_clickable((By.XPATH, SEARCH_BUTTON_XPATH))
+        ).click()
+        search_box = self.wait.until(
+            EC.element_to_be_clickable((By.XPATH, SEARCH_BOX_XPATH))
         )
         search_box.send_keys(query)
         search_box.send_keys(Keys.RETURN)
-        time.sleep(3)
 
-        first_result = self.driver.find_element(
-            By.XPATH, '//*[@id="root"]/div/div/section[2]/div/div/ul/div/div/li[1]'
-        )
+        started = time.monotonic()
+        try:
+            first_result = self.wait.until(
+                EC.element_to_be_clickable((By.XPATH, FIRST_RESULT_XPATH))
+            )
+        except TimeoutException:
+            # 검색 결과가 없으면 첫 번째 결과가 끝까지 나타나지 않음
+            raise NoSuchElementException(f"No search result for {query}")
         first_result.click()
-        time.sleep(3)
+        # 검색 결과 화면이 사라지고 수업 페이지의 통계가 나타날 때까지 대기
+        self.wait.until(EC.staleness_of(first_result))
+        self.wait.until(
+            EC.presence_of_element_located((By.XPATH, STAT_XPATHS["satisfaction"]))
+        )
+        elapsed = time.monotonic() - started
+
+        self.load_all_reviews()
+        return elapsed
 
-        # Scroll down to the bottom of the page (because the page is lazy-loaded)
-        for i in range(10):
+    def load_all_reviews(self, max_scrolls: int = 10, scroll_timeout: float = 3.0):
+        # 강의평은 lazy-load되므로 더 이상 늘어나지 않을 때까지 scroll
+        count = self.review_count()
+        for _ in range(max_scrolls):
             self.driver.execute_script(
                 "window.scrollTo(0, document.body.scrollHeight);"
             )
-            time.sleep(0.5)
-        time.sleep(3)
-        # Save the page source to a file
-        # path = os.path.join("klue_sources", f"{query}.html")
-        # with open(path, "w") as f:
-        #     f.write(self.driver.page_source)
-
-    def extract_reviews(self):
-        review_elements = self.driver.find_element(
-            By.XPATH, '//*[@id="root"]/div/div/section[3]/div/div/div[2]/div'
-        ).find_elements(By.XPATH, "*")
-        reviews: List[Review] = []
-
-        grades = []
-        grade_map = {"기대 이상": 5, "보통": 3, "기대 이하": 1}
-
-        attendance_map = {
-            "매번함": 5,
-            "자주함": 4,
-            "종종함": 3,
-            "거의안함": 2,
-            "아예안함": 1,
-        }
-
-        for review_element in review_elements:
-            review_text = review_element.find_element(
-                By.XPATH, "div/div/div[2]/div[1]"
-            ).text
-
-            grade_text = review_element.find_elements(
-                By.XPATH, "div/div/div[2]/div[2]/span"
-            )[-1].text.replace("'", "")
-            grade = grade_map[grade_text]
-            grades.append(grade)
-
-            reviews.append(Review(text=review_text))
+            try:
+                WebDriverWait(self.driver, scroll_timeout).until(
+                    lambda driver: self.review_count() > count
+                )
+            except TimeoutException:
+                break
+            count = self.review_count()
 
-        print("로드된 강의평 수: ", len(reviews), len(review_elements))
+    def review_count(self) -> int:
+        return len(self.driver.find_elements(By.XPATH, REVIEW_LIST_XPATH + "/*"))
 
-        satisfaction = float(
-            self.driver.find_element(
-                By.XPATH,
-                '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[1]/div[1]/span',
-            ).text
-        )
-        attendance = float(
-            attendance_map[
-                self.driver.find_element(
-                    By.XPATH,
-                    '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[2]/div/div[1]/span',
-                ).text
-            ]
-        )
-        workload = float(
-            self.driver.find_element(
-                By.XPATH,
-                '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[1]/div[1]/div[1]/span[2]',
-            ).text
-        )
-        difficulty = float(
-            self.driver.find_element(
-                By.XPATH,
-                '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[1]/div[2]/div[1]/span[2]',
-            ).text
-        )
-        delivery = float(
-            self.driver.find_element(
-                By.XPATH,
-                '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[2]/div[1]/div[1]/span[2]',
-            ).text
-        )
-        achievement = float(
-            self.driver.find_element(
-                By.XPATH,
-                '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[2]/div[2]/div[1]/span[2]',
-            ).text
-        )
-        grade = round(sum(grades) / len(grades), 1)
+    def extract_reviews(self, query: str):
+        # 요소마다 WebDriver를 호출하지 않고 page source를 한 번만 가져와서 parsing
+        page_source = self.driver.page_source
+        self.save_page_source(query, page_source)
+        reviews, review_stat = parse_klue_page(page_source)
 
+        print("로드된 강의평 수: ", len(reviews))
         print(
-            f"만족도: {satisfaction}, 출석: {attendance}, 학습량: {workload}, 난이도: {difficulty}, 강의력: {delivery}, 성취감: {achievement}, 학점: {grade}"
+            f"만족도: {review_stat['satisfaction']}, 출석: {review_stat['attendance']}, 학습량: {review_stat['workload']}, 난이도: {review_stat['difficulty']}, 강의력: {review_stat['delivery']}, 성취감: {review_stat['achievement']}, 학점: {review_stat['grade']}"
         )
-        review_stat = ReviewStat(
-            satisfaction=satisfaction,
-            attendance=attendance,
-            workload=workload,
-            difficulty=difficulty,
-            delivery=delivery,
-            achievement=achievement,
-            grade=grade,
-        )
-
         return reviews, review_stat
 
+    def save_page_source(self, query: str, page_source: str):
+        # 저장해둔 page는 다시 크롤링하지 않고 parsing만 할 때 사용 (skip_crawling)
+        os.makedirs(self.page_dir, exist_ok=True)
+        with open(self.page_path(query), "w", encoding="utf-8") as f:
+            f.write(page_source)
+
+    def page_path(self, query: str) -> str:
+        return os.path.join(self.page_dir, f"{query}.html")
+
+    def extract_saved_pages(self):
+        """
+        Parse the pages saved by earlier crawls without opening a browser.
+        """
+        try:
+            for course in self.courses:
+                path = self.page_path(course.course_no + " " + course.instructor)
+                if not os.path.exists(path):
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        reviews, review_stat = parse_klue_page(f.read())
+                except Exception as error:
+                    print(f"Failed to parse {path}: {error!r}")
+                    self.pending_failures[course.id] = (
+                        f"{type(error).__name__}: {error}"
+                    )
+                    continue
+                self.pending_reviews[course.id] = reviews
+                self.pending_review_stats[course.id] = review_stat
+        finally:
+            self.flush()
+
     def login(self):
-        self.driver.find_element(
-            By.XPATH, '//*[@id="root"]/div/div/div/div/div/div/input[1]'
+        self.wait.until(
+            EC.element_to_be_clickable(
+                (By.XPATH, '//*[@id="root"]/div/div/div/div/div/div/input[1]')
+            )
         ).send_keys(os.getenv("KLUE_ID"))
         self.driver.find_element(
             By.XPATH, '//*[@id="root"]/div/div/div/div/div/div/input[2]'
@@ -192,6 +266,11 @@ class KLUECrawler:
         ).click()
 
 
+SEARCH_BUTTON_XPATH = '//*[@id="root"]/div/header/div/div/div[1]/a[1]'
+SEARCH_BOX_XPATH = '//*[@id="root"]/div/div/section[1]/div/div/div/input'
+FIRST_RESULT_XPATH = '//*[@id="root"]/div/div/section[2]/div/div/ul/div/div/li[1]'
+
+
 if __name__ == "__main__":
     crawler = KLUECrawler(
         page_dir="klue_sources", db_path="course.db", skip_crawling=False
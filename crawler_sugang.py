@@ -1,22 +1,52 @@
 import time
-from typing import List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
 
-import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select
-from webdriver_manager.chrome import ChromeDriverManager
+from bs4 import BeautifulSoup, Tag
 
 from db.db_manager import DBMananger
-from db.models.course import Course
+from db.timeslot import parse_timeslot
+from http_cache import CacheEntry, ResponseCache, row_hash
+from http_fetcher import ConcurrentFetcher
+
+# 강의계획서에서 가져오는 컬럼 - 불러오지 못하면 DB에 있던 값을 유지
+DETAIL_COLUMNS = ("course_intro", "prerequisite", "syllabus")
 
 
 class Crawler:
-    def __init__(self, course_page_path: str, db_path: str):
+    SYLLABUS_URL = "https://infodepot.korea.ac.kr/lecture1/lecsubjectPlanViewNew.jsp?year=2024&term=1R&grad_cd=0136&col_cd=9999&dept_cd={dept_code}&cour_cd={course_no}&cour_cls={course_class}&cour_nm=&std_id=&device=WW&language=ko"
+
+    def __init__(
+        self,
+        course_page_path: str,
+        db_path: str,
+        max_workers: int = 8,
+        requests_per_second: float = 4.0,
+        parse_workers: int = 2,
+        syllabus_url_template: str = SYLLABUS_URL,
+        cache_path: Optional[str] = None,
+    ):
         self.course_page_path = course_page_path
         self.db_path = db_path
+        # 강의계획서 요청은 keep-alive session 하나로 동시에 (host당 요청 수 제한)
+        self.fetcher = ConcurrentFetcher(
+            max_workers=max_workers, requests_per_second=requests_per_second
+        )
+        self.parse_workers = parse_workers
+        # 로컬 stub 서버로 바꿔서 테스트할 수 있도록 URL template을 받음
+        self.syllabus_url_template = syllabus_url_template
+        # 다시 크롤링할 때 바뀌지 않은 강의계획서는 parsing과 DB 저장을 건너뜀
+        self.cache = ResponseCache(cache_path) if cache_path is not None else None
+        self.stats = {
+            "fetched": 0,
+            "unchanged": 0,
+            "new": 0,
+            "changed": 0,
+            "failed": 0,
+            "written": 0,
+        }
+        # 강의계획서를 불러오지 못했고 캐시에도 없는 수업의 URL
+        self.failed_urls: Set[str] = set()
 
     def crawl(self):
         if not self.course_page_path:
@@ -27,6 +57,13 @@ class Crawler:
         """
         Load courses from the website and save the page source to a file.
         """
+        # 강의계획서만 다시 받을 때는 browser가 필요 없으므로 여기서 import
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import Select
+        from webdriver_manager.chrome import ChromeDriverManager
+
         driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
         # Connect to the website and load courses
         driver.get("https://sugang.korea.ac.kr")
@@ -76,7 +113,7 @@ class Crawler:
 
         rows = soup.find_all("tr")
 
-        courses: List[Course] = []
+        courses: List[dict] = []
         for row in rows:
             cols = row.find_all("td")
             idx = [1, 2, 3, 4, 5, 6, 7, 8]
@@ -90,7 +127,7 @@ class Crawler:
                 "credit": 7,
                 "room": 8,
             }
-            course_info = {}
+            course_info: Dict[str, Any] = {}
             for key, value in name2idx.items():
                 course_info[key] = cols[value].text
                 if key == "credit":
@@ -98,78 +135,186 @@ class Crawler:
                 elif key == "room":
                     time, room = self.parse_time_and_room(course_info[key])
                     course_info["timeslot"] = time
+                    course_info["timeslot_mask"] = parse_timeslot(time)
                     course_info["room"] = room
 
             # Skip courses without instructors
             if not course_info["instructor"]:
                 continue
 
-            course_info = self.load_details(course_info)
-            course = Course(**course_info)
-            db = DBMananger(self.db_path, init_db=True)
+            courses.append(course_info)
 
-            courses.append(course)
-        db.create_courses(courses)
+        courses = self.load_all_details(courses)
+        changed = self.changed_courses(courses)
 
-    def load_details(self, course_info: dict) -> dict:
+        loaded = {
+            url: course
+            for url, course in changed.items()
+            if url not in self.failed_urls
+        }
+        failed = [course for url, course in changed.items() if url in self.failed_urls]
+
+        # 한 번에 upsert (다시 크롤링해도 같은 학수번호/분반은 덮어씀)
+        db = DBMananger(self.db_path, init_db=True)
+        db.upsert_courses(list(loaded.values()))
+        # 일시적인 실패로 기존 강의계획서가 지워지지 않도록 detail 컬럼은 그대로 둠
+        db.upsert_courses(failed, keep_columns=DETAIL_COLUMNS)
+        self.stats["written"] = len(changed)
+        if self.cache is not None:
+            # 불완전한 row는 다음 크롤링에서 다시 쓰도록 hash를 남기지 않음
+            self.cache.set_row_hashes(
+                {url: row_hash(course) for url, course in loaded.items()}
+            )
+            self.cache.commit()
+        print(f"Recrawl stats: {self.stats}")
+
+    def changed_courses(self, courses: List[dict]) -> Dict[str, dict]:
         """
-        Load course details from the website.
+        Courses (by syllabus URL) whose row differs from the last one written.
         """
-        url_base = "https://infodepot.korea.ac.kr/lecture1/lecsubjectPlanViewNew.jsp?year=2024&term=1R&grad_cd=0136&col_cd=9999&dept_cd={dept_code}&cour_cd={course_no}&cour_cls={course_class}&cour_nm=&std_id=&device=WW&language=ko"
-        url = url_base.format(
+        urls = [self.syllabus_url(course) for course in courses]
+        entries = self.cache.get_many(urls) if self.cache is not None else {}
+        return {
+            url: course
+            for url, course in zip(urls, courses)
+            if url not in entries or entries[url].row_hash != row_hash(course)
+        }
+
+    def load_all_details(self, course_infos: List[dict]) -> List[dict]:
+        """
+        Fetch the syllabus pages concurrently and parse them on a process pool
+        as they arrive, so parsing never blocks the network threads.
+        """
+        urls = [self.syllabus_url(course_info) for course_info in course_infos]
+        entries = self.cache.get_many(urls) if self.cache is not None else {}
+        self.failed_urls = set()
+        headers = [ResponseCache.conditional_headers(entries.get(url)) for url in urls]
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool:
+            futures = {}
+            for i, response, error in self.fetcher.fetch_all(urls, headers):
+                entry = entries.get(urls[i])
+                if error is not None:
+                    print(f"Failed to load details of {urls[i]}: {error}")
+                    self.keep_cached_details(urls[i], course_infos[i], entry)
+                    continue
+                assert response is not None
+                if response.status_code == 200:
+                    self.stats["fetched"] += 1
+
+                # 내용이 같으면 저장해둔 parsing 결과를 그대로 사용
+                if entry is not None and ResponseCache.is_unchanged(entry, response):
+                    self.stats["unchanged"] += 1
+                    course_infos[i].update(entry.details)
+                    if self.cache is not None:
+                        self.cache.touch(urls[i], response)
+                    continue
+
+                self.stats["new" if entry is None else "changed"] += 1
+                future = parse_pool.submit(parse_syllabus_page, response.content)
+                futures[future] = (i, response)
+
+            for future in as_completed(futures):
+                i, response = futures[future]
+                try:
+                    details = future.result()
+                except Exception as e:
+                    # 형식이 다른 페이지 하나 때문에 전체 크롤링 결과를 버리지 않음
+                    print(f"Failed to parse details of {urls[i]}: {e!r}")
+                    self.keep_cached_details(
+                        urls[i], course_infos[i], entries.get(urls[i])
+                    )
+                    continue
+                if self.cache is not None:
+                    self.cache.put(urls[i], response, details)
+
+                course_info = course_infos[i]
+                course_info.update(details)
+                if "syllabus" not in course_info:
+                    print(course_info["course_name"], course_info["instructor"])
+                    print("No syllabus available.")
+        return course_infos
+
+    def keep_cached_details(
+        self, url: str, course_info: dict, entry: Optional[CacheEntry]
+    ):
+        self.stats["failed"] += 1
+        # 일시적인 실패로 기존 강의계획서가 지워지지 않도록 캐시 값을 사용
+        if entry is not None:
+            course_info.update(entry.details)
+        else:
+            self.failed_urls.add(url)
+
+    def syllabus_url(self, course_info: dict) -> str:
+        return self.syllabus_url_template.format(
             dept_code=5722,
             course_no=course_info["course_no"],
             course_class=course_info["course_class"],
         )
-        page = requests.get(url)
-        soup = BeautifulSoup(page.content, "html.parser")
-
-        course_intro = soup.select_one(
-            "body > div > div.page > form:nth-child(1) > div.bottom_view > table:nth-child(3) > tbody > tr:nth-child(2) > td"
-        ).text
-        course_info["course_intro"] = course_intro
-
-        # Check if syllabus is available
-        if "▶ 첨부파일" in page.text:
-            print(course_info["course_name"], course_info["instructor"])
-            print("No syllabus available.")
-            return course_info
-
-        prereq_1 = soup.select_one(
-            "body > div > div.page > form:nth-child(1) > table:nth-child(29) > tbody > tr:nth-child(2) > td"
-        ).text
-        prereq_2 = soup.select_one(
-            "body > div > div.page > form:nth-child(1) > table:nth-child(29) > tbody > tr:nth-child(4) > td"
-        ).text
-        course_info["prerequisite"] = prereq_1 + "\n" + prereq_2
-
-        syllabus_table = soup.select_one(
-            "body > div > div.page > form:nth-child(1) > table:nth-child(39) > tbody"
-        )
-        syllabus = ""
-        max_weeks = 16
-        for idx, row in enumerate(syllabus_table.find_all("tr")):
-            if idx >= max_weeks:
-                break
-            week = row.find_all("td")[0].text.strip()
-            content = row.find_all("td")[1].text.strip()
-            syllabus += f"{week}: {content}\n"
-        course_info["syllabus"] = syllabus
-
-        return course_info
 
     def parse_time_and_room(self, text: str):
         if text == "":
             return "", ""
 
         lines = text.split("\n")
-        timeslots = []
         timeslot_str = " ".join([line.split()[0] for line in lines])
         room_str = " ".join(lines[0].split()[1:]) if len(lines[0].split()) > 1 else ""
 
         return timeslot_str, room_str
 
 
+def select_one(soup: Tag, selector: str) -> Tag:
+    found = soup.select_one(selector)
+    if found is None:
+        raise ValueError(f"Missing {selector!r} in syllabus page")
+    return found
+
+
+def parse_syllabus_page(page: bytes) -> dict:
+    """
+    Parse course_intro, prerequisite and syllabus out of a syllabus page.
+    """
+    soup = BeautifulSoup(page, "html.parser")
+    details = {}
+
+    details["course_intro"] = select_one(
+        soup,
+        "body > div > div.page > form:nth-child(1) > div.bottom_view > table:nth-child(3) > tbody > tr:nth-child(2) > td",
+    ).text
+
+    # Check if syllabus is available
+    if "▶ 첨부파일" in soup.get_text():
+        return details
+
+    prereq_1 = select_one(
+        soup,
+        "body > div > div.page > form:nth-child(1) > table:nth-child(29) > tbody > tr:nth-child(2) > td",
+    ).text
+    prereq_2 = select_one(
+        soup,
+        "body > div > div.page > form:nth-child(1) > table:nth-child(29) > tbody > tr:nth-child(4) > td",
+    ).text
+    details["prerequisite"] = prereq_1 + "\n" + prereq_2
+
+    syllabus_table = select_one(
+        soup, "body > div > div.page > form:nth-child(1) > table:nth-child(39) > tbody"
+    )
+    syllabus = ""
+    max_weeks = 16
+    for idx, row in enumerate(syllabus_table.select("tr")):
+        if idx >= max_weeks:
+            break
+        cells = row.select("td")
+        week = cells[0].text.strip()
+        content = cells[1].text.strip()
+        syllabus += f"{week}: {content}\n"
+    details["syllabus"] = syllabus
+
+    return details
+
+
 if __name__ == "__main__":
-    crawler = Crawler("page_source.html", db_path="course.db")
+    crawler = Crawler(
+        "page_source.html", db_path="course.db", cache_path="syllabus_cache.sqlite"
+    )
     crawler.crawl()
@@ -1,19 +1,212 @@
+import io
 import json
-from typing import List
+import sqlite3
+import sys
+import time
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+    cast,
+)
 
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Table,
+    create_engine,
+    delete,
+    event,
+    inspect,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.schema import CreateColumn
 
-from db.models import Base, Course
+from db.fts_index import create_fts_index
+from db.models import Base, Course, CrawlProgress, Review, ReviewStat
+
+# 같은 파일에 대해서는 engine(커넥션 풀)을 하나만 만들어서 공유
+_engines: Dict[str, Engine] = {}
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # 64MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+# 예전에 선언했다가 바뀐 인덱스 (남아 있으면 새 key로 저장할 때 충돌함)
+OBSOLETE_INDEXES = {"review": ["ix_review_course_id_text"]}
+
+
+def get_engine(db_path: str) -> Engine:
+    if db_path not in _engines:
+        engine = create_engine(f"sqlite:///{db_path}")
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for key, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {key}={value}")
+            cursor.close()
+
+        _engines[db_path] = engine
+    return _engines[db_path]
 
 
 class DBMananger:
+    BULK_CHUNK_SIZE = 500
+
     def __init__(self, db_path: str, init_db: bool = False):
-        self.engine = create_engine(f"sqlite:///{db_path}")
+        self.engine = get_engine(db_path)
 
         self.base = Base()
         if init_db:
             self.base.metadata.create_all(self.engine)
+            self.add_missing_columns()
+            self.create_indexes()
+
+    def add_missing_columns(self):
+        """
+        Add columns declared on the models to tables created before them, if
+        they are nullable or have a server default.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in self.base.metadata.sorted_tables:
+                existing = {
+                    column["name"] for column in inspector.get_columns(table.name)
+                }
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    if column.nullable or column.server_default is not None:
+                        column_ddl = CreateColumn(column).compile(
+                            dialect=self.engine.dialect
+                        )
+                        connection.execute(
+                            text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+                        )
+
+    def create_indexes(self):
+        """
+        Add indexes declared on the models to tables created before them.
+
+        A unique index that the existing rows violate is skipped with a
+        message; ``migrate`` merges those rows explicitly.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table_name, index_names in OBSOLETE_INDEXES.items():
+                existing = {
+                    index["name"] for index in inspector.get_indexes(table_name)
+                }
+                for index_name in index_names:
+                    if index_name in existing:
+                        connection.execute(text(f"DROP INDEX {index_name}"))
+
+        missing = [
+            (table, index)
+            for table in self.base.metadata.sorted_tables
+            for index in table.indexes
+            if index.name
+            not in {existing["name"] for existing in inspector.get_indexes(table.name)}
+        ]
+        for table, index in missing:
+            try:
+                index.create(self.engine)
+            except IntegrityError:
+                print(
+                    f"Skipped unique index {index.name}: {table.name} has "
+                    "duplicate rows from older crawls. Run DBMananger.migrate() "
+                    "(python -m db.db_manager) to merge them."
+                )
+
+    def migrate(self):
+        """
+        One-off migration for a DB written by the older crawlers, which appended
+        a new course row on every crawl. Run it explicitly, then the unique
+        indexes are created.
+
+        Courses with the same (course_no, course_class) are merged into the
+        latest row (max id). The merged course keeps the reviews of its newest
+        row that has any, and the latest review_stat / crawl_progress. Reviews
+        with the same text are kept and numbered by ``occurrence``.
+        """
+        with self.engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TEMP TABLE course_merge AS "
+                    "SELECT course.id AS old_id, keep.id AS new_id FROM course "
+                    "JOIN (SELECT max(id) AS id, course_no, course_class FROM course "
+                    "GROUP BY course_no, course_class HAVING count(*) > 1) AS keep "
+                    "ON course.course_no = keep.course_no "
+                    "AND course.course_class = keep.course_class"
+                )
+            )
+            # 같은 수업의 강의평이 여러 row에 복사되어 있으면 가장 최근 것만 사용
+            connection.execute(
+                text(
+                    "DELETE FROM review WHERE course_id IN "
+                    "(SELECT old_id FROM course_merge) AND course_id NOT IN "
+                    "(SELECT max(review.course_id) FROM review JOIN course_merge "
+                    "ON review.course_id = course_merge.old_id "
+                    "GROUP BY course_merge.new_id)"
+                )
+            )
+            for table in ("review_stat", "crawl_progress"):
+                connection.execute(
+                    text(
+                        f"DELETE FROM {table} WHERE id NOT IN "
+                        f"(SELECT max({table}.id) FROM {table} LEFT JOIN course_merge "
+                        f"ON {table}.course_id = course_merge.old_id "
+                        f"GROUP BY coalesce(course_merge.new_id, {table}.course_id))"
+                    )
+                )
+            for table in ("review", "review_stat", "crawl_progress"):
+                connection.execute(
+                    text(
+                        f"UPDATE {table} SET course_id = (SELECT new_id FROM "
+                        f"course_merge WHERE old_id = {table}.course_id) "
+                        "WHERE course_id IN (SELECT old_id FROM course_merge)"
+                    )
+                )
+            connection.execute(
+                text(
+                    "DELETE FROM course WHERE id IN "
+                    "(SELECT old_id FROM course_merge WHERE old_id != new_id)"
+                )
+            )
+            connection.execute(text("DROP TABLE course_merge"))
+
+            connection.execute(
+                text(
+                    "UPDATE review SET occurrence = (SELECT count(*) FROM review AS "
+                    "earlier WHERE earlier.course_id = review.course_id "
+                    "AND earlier.text = review.text AND earlier.id < review.id)"
+                )
+            )
+        self.create_indexes()
+
+    def build_fts_index(self):
+        """
+        Rebuild the FTS5 lexical index (course_fts) from the course and review tables.
+        """
+        connection = self.engine.raw_connection()
+        try:
+            create_fts_index(cast(sqlite3.Connection, connection.driver_connection))
+        finally:
+            connection.close()
 
     def create_courses(self, course: List[Course]):
         with Session(self.engine) as session:
@@ -31,26 +224,260 @@ class DBMananger:
             course.review_stat = review_stat
             session.commit()
 
-    def convert_to_json(self):
+    def upsert_courses(
+        self, courses: List[dict], keep_columns: Sequence[str] = ()
+    ) -> int:
+        """
+        Insert courses, or update them in place when (course_no, course_class)
+        already exists, with one executemany per chunk.
+
+        ``keep_columns`` are only written for new courses; existing rows keep
+        their current values (e.g. details that failed to load this time).
+        """
+        table = cast(Table, Course.__table__)
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.course_no, table.c.course_class],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if column.name not in ("id", "course_no", "course_class")
+                and column.name not in keep_columns
+            },
+        )
+        # executemany는 모든 row의 key가 같아야 하므로 빠진 컬럼은 None으로 채움
+        columns = [column.name for column in table.columns if column.name != "id"]
+        self._execute_many(
+            statement,
+            [{column: course.get(column) for column in columns} for course in courses],
+        )
+        return len(courses)
+
+    def replace_reviews(self, reviews: Dict[int, List[dict]]) -> int:
+        """
+        Replace the reviews of each ``course_id`` in ``reviews`` (like
+        ``course.reviews = reviews``), all in one transaction.
+
+        Reviews are upserted on (course_id, text, occurrence), where occurrence
+        numbers reviews with the same text, so a review that is still there
+        keeps its id and the incremental vector index build skips it.
+        """
+        rows_by_course: Dict[int, List[dict]] = {}
+        for course_id, course_reviews in reviews.items():
+            occurrences: Dict[str, int] = {}
+            rows_by_course[course_id] = []
+            for review in course_reviews:
+                occurrence = occurrences.get(review["text"], 0)
+                occurrences[review["text"]] = occurrence + 1
+                rows_by_course[course_id].append(
+                    dict(review, course_id=course_id, occurrence=occurrence)
+                )
+        rows = [row for course_rows in rows_by_course.values() for row in course_rows]
+
+        table = cast(Table, Review.__table__)
+        statement = insert(table).on_conflict_do_nothing(
+            index_elements=[table.c.course_id, table.c.text, table.c.occurrence]
+        )
         with Session(self.engine) as session:
-            courses = session.scalars(select(Course)).all()
-            courses_dict = []
-            for course in courses:
-                course_dict = course.as_dict()
-                if course.review_stat:
-                    course_dict["review_stat"] = course.review_stat.as_dict()
-                else:
-                    print(
-                        f"{course.course_name} - {course.instructor} does not have review_stat"
+            # 이번에 없는 강의평만 삭제
+            for course_id, course_rows in rows_by_course.items():
+                session.execute(
+                    delete(Review).where(
+                        Review.course_id == course_id,
+                        tuple_(Review.text, Review.occurrence).not_in(
+                            [(row["text"], row["occurrence"]) for row in course_rows]
+                        ),
                     )
+                )
+            for start in range(0, len(rows), self.BULK_CHUNK_SIZE):
+                session.execute(statement, rows[start : start + self.BULK_CHUNK_SIZE])
+            session.commit()
+        return len(rows)
+
+    def upsert_review_stats(self, review_stats: Dict[int, dict]) -> int:
+        """
+        Insert or overwrite the review_stat row of each ``course_id``.
+        """
+        table = cast(Table, ReviewStat.__table__)
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.course_id],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if column.name not in ("id", "course_id")
+            },
+        )
+        self._execute_many(
+            statement,
+            [
+                dict(review_stat, course_id=course_id)
+                for course_id, review_stat in review_stats.items()
+            ],
+        )
+        return len(review_stats)
+
+    def save_reviews(
+        self, reviews: Dict[int, List[dict]], review_stats: Dict[int, dict]
+    ):
+        # 크롤러에서 여러 수업의 결과를 모아서 한 번에 저장할 때 사용
+        self.replace_reviews(reviews)
+        self.upsert_review_stats(review_stats)
+
+    def init_crawl_progress(self, course_ids: List[int]):
+        """
+        Add a ``pending`` crawl_progress row for courses that have none yet.
+        """
+        table = cast(Table, CrawlProgress.__table__)
+        statement = insert(table).on_conflict_do_nothing(
+            index_elements=[table.c.course_id]
+        )
+        now = time.time()
+        self._execute_many(
+            statement,
+            [
+                {"course_id": course_id, "status": "pending", "updated_at": now}
+                for course_id in course_ids
+            ],
+        )
 
-                course_dict["reviews"] = []
-                for review in course.reviews:
-                    review_dict = review.as_dict()
-                    course_dict["reviews"].append(review_dict)
-                courses_dict.append(course_dict)
+    def read_crawl_progress(self) -> Dict[int, Tuple[str, int]]:
+        """
+        ``course_id -> (status, attempts)`` of every course in crawl_progress.
+        """
+        with Session(self.engine) as session:
+            rows = session.execute(
+                select(
+                    CrawlProgress.course_id,
+                    CrawlProgress.status,
+                    CrawlProgress.attempts,
+                )
+            )
+            return {
+                course_id: (status, attempts) for course_id, status, attempts in rows
+            }
+
+    def update_crawl_progress(self, progress: Dict[int, Tuple[str, Optional[str]]]):
+        """
+        Set ``(status, error)`` of each ``course_id`` and count the attempt.
+        """
+        table = cast(Table, CrawlProgress.__table__)
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.course_id],
+            set_={
+                "status": statement.excluded.status,
+                "error": statement.excluded.error,
+                "updated_at": statement.excluded.updated_at,
+                "attempts": table.c.attempts + 1,
+            },
+        )
+        now = time.time()
+        self._execute_many(
+            statement,
+            [
+                {
+                    "course_id": course_id,
+                    "status": status,
+                    # String(200) 컬럼이므로 긴 에러 메시지는 자름
+                    "error": error[:200] if error else None,
+                    "attempts": 1,
+                    "updated_at": now,
+                }
+                for course_id, (status, error) in progress.items()
+            ],
+        )
 
+    def _execute_many(self, statement, rows: List[dict]):
+        with Session(self.engine) as session:
+            for start in range(0, len(rows), self.BULK_CHUNK_SIZE):
+                session.execute(statement, rows[start : start + self.BULK_CHUNK_SIZE])
             session.commit()
 
-        courses_json = json.dumps(courses_dict, ensure_ascii=False, indent=4)
-        return courses_json
+    def iter_course_dicts(self, chunk_size: int = 256) -> Iterator[List[dict]]:
+        """
+        Yield courses (with review_stat and reviews) as dicts, chunk by chunk.
+        """
+        with Session(self.engine) as session:
+            last_id = 0
+            while True:
+                courses = session.scalars(
+                    select(Course)
+                    .where(Course.id > last_id)
+                    .order_by(Course.id)
+                    .limit(chunk_size)
+                    .options(
+                        selectinload(Course.review_stat), selectinload(Course.reviews)
+                    )
+                ).all()
+                if not courses:
+                    break
+
+                yield [self._course_to_dict(course) for course in courses]
+                last_id = courses[-1].id
+                # 이미 내보낸 객체는 세션에서 제거해서 메모리가 쌓이지 않도록
+                session.expunge_all()
+
+    def iter_course_records(self, chunk_size: int = 256) -> Iterator[dict]:
+        for courses in self.iter_course_dicts(chunk_size=chunk_size):
+            yield from courses
+
+    def export_ndjson(self, output: Union[str, TextIO], chunk_size: int = 256) -> int:
+        """
+        Write one course (with review_stat and reviews) per line to ``output``,
+        a path or a text file object. Returns the number of courses written.
+        """
+        if isinstance(output, str):
+            with open(output, "w", encoding="utf-8") as f:
+                return self.export_ndjson(f, chunk_size=chunk_size)
+
+        n_courses = 0
+        for course_dict in self.iter_course_records(chunk_size=chunk_size):
+            output.write(json.dumps(course_dict, ensure_ascii=False))
+            output.write("\n")
+            n_courses += 1
+        return n_courses
+
+    def convert_to_json(self, output: Optional[Union[str, TextIO]] = None):
+        """
+        Same JSON array as before, written course by course. Returns the JSON
+        string when ``output`` is not given.
+        """
+        if output is None:
+            buffer = io.StringIO()
+            self.convert_to_json(buffer)
+            return buffer.getvalue()
+        if isinstance(output, str):
+            with open(output, "w", encoding="utf-8") as f:
+                return self.convert_to_json(f)
+
+        # json.dumps(courses, indent=4)와 같은 형식으로 한 개씩 이어서 씀
+        output.write("[")
+        n_courses = 0
+        for course_dict in self.iter_course_records():
+            record = json.dumps(course_dict, ensure_ascii=False, indent=4)
+            output.write(",\n    " if n_courses else "\n    ")
+            output.write(record.replace("\n", "\n    "))
+            n_courses += 1
+        output.write("\n]" if n_courses else "]")
+        return n_courses
+
+    def _course_to_dict(self, course: Course) -> dict:
+        course_dict = course.as_dict()
+        if course.review_stat:
+            course_dict["review_stat"] = course.review_stat.as_dict()
+        else:
+            print(
+                f"{course.course_name} - {course.instructor} does not have review_stat"
+            )
+
+        course_dict["reviews"] = []
+        for review in course.reviews:
+            review_dict = review.as_dict()
+            course_dict["reviews"].append(review_dict)
+        return course_dict
+
+
+if __name__ == "__main__":
+    # 예전 크롤러가 만든 DB를 한 번 정리: python -m db.db_manager [course.db]
+    DBMananger(sys.argv[1] if len(sys.argv) > 1 else "course.db").migrate()
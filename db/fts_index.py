@@ -0,0 +1,185 @@
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Set
+
+FTS_TABLE = "course_fts"
+COURSE_CODE_PATTERN = re.compile(r"\b[A-Z]{4}\d{3}\b")
+
+# trigram tokenizer라서 3글자 미만의 단어는 검색할 수 없음
+MIN_TERM_LENGTH = 3
+PARTICLE_PATTERN = re.compile(
+    r"(으로|에서|에게|하는|이랑|을|를|이|가|은|는|의|에|와|과|로|도|만)$"
+)
+STOPWORDS = {
+    "관련된",
+    "관련한",
+    "내용을",
+    "배우는",
+    "배우고",
+    "수업을",
+    "싶어요",
+    "좋겠어",
+}
+
+
+def lexical_terms(text: str) -> List[str]:
+    """
+    Course codes, latin words and Korean words (minus a trailing particle)
+    that are long enough for the trigram index.
+    """
+    terms = []
+    for word in re.findall(r"[A-Za-z0-9+#]+|[가-힣]+", text):
+        if re.fullmatch(r"[가-힣]+", word) and len(word) > MIN_TERM_LENGTH:
+            word = PARTICLE_PATTERN.sub("", word)
+        if len(word) >= MIN_TERM_LENGTH and word not in STOPWORDS:
+            terms.append(word)
+    return list(dict.fromkeys(terms))
+
+
+def create_fts_index(connection: sqlite3.Connection):
+    """
+    (Re)build the FTS5 index over course names, intros, syllabi and reviews
+    in one transaction, so readers see either the old or the new index.
+    """
+    # DDL도 같은 트랜잭션에 넣기 위해 BEGIN을 직접 실행
+    connection.execute("BEGIN")
+    try:
+        connection.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        connection.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "course_id UNINDEXED, course_no, course_name, course_intro, syllabus, "
+            "reviews, tokenize='trigram')"
+        )
+        connection.execute(
+            f"INSERT INTO {FTS_TABLE} "
+            "SELECT course.id, course.course_no, course.course_name, "
+            "coalesce(course.course_intro, ''), coalesce(course.syllabus, ''), "
+            "coalesce((SELECT group_concat(review.text, char(10)) FROM review "
+            "WHERE review.course_id = course.id), '') "
+            "FROM course"
+        )
+    except Exception:
+        connection.rollback()
+        raise
+    connection.commit()
+
+
+@dataclass
+class LexicalResult:
+    course_ids: List[str] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    # 학수번호가 정확히 일치 → dense 검색 없이 바로 사용
+    exact: bool = False
+    # 드물게 등장하는 단어가 일치 → dense 검색을 줄여도 됨
+    strong: bool = False
+
+
+class LexicalIndex:
+    """
+    BM25 candidate generator over the FTS5 table in the course SQLite DB.
+    """
+
+    # column weight: course_id, course_no, course_name, course_intro, syllabus, reviews
+    BM25_WEIGHTS = (0.0, 10.0, 5.0, 3.0, 2.0, 1.0)
+
+    def __init__(self, db_path: str, rare_term_max_courses: int = 8):
+        self.connection: Optional[sqlite3.Connection] = None
+        try:
+            connection = sqlite3.connect(
+                f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            found = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (FTS_TABLE,),
+            ).fetchone()
+        except sqlite3.OperationalError as error:
+            print(f"Cannot open {db_path} ({error}), lexical retrieval is disabled")
+        else:
+            if found:
+                self.connection = connection
+            else:
+                connection.close()
+                print(
+                    f"{db_path} has no {FTS_TABLE} table (run "
+                    "DBMananger.build_fts_index), lexical retrieval is disabled"
+                )
+        self.rare_term_max_courses = rare_term_max_courses
+        # 여러 executor thread가 connection 하나를 같이 쓰므로 조회는 하나씩
+        self.lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.connection is not None
+
+    def search(
+        self,
+        queries: Sequence[str],
+        limit: int = 32,
+        allowed_course_ids: Optional[Set[str]] = None,
+    ) -> LexicalResult:
+        terms = list(
+            dict.fromkeys(t for query in queries for t in lexical_terms(query))
+        )
+        if not terms or not self.available:
+            return LexicalResult()
+
+        codes = [term for term in terms if COURSE_CODE_PATTERN.fullmatch(term)]
+        if codes:
+            rows = self._match(" OR ".join(f"course_no:{_quote(c)}" for c in codes))
+            course_ids = _allowed(rows, allowed_course_ids)
+            if course_ids:
+                return LexicalResult(
+                    course_ids=course_ids[:limit],
+                    scores=[1.0] * len(course_ids[:limit]),
+                    exact=True,
+                    strong=True,
+                )
+
+        document_frequency = {term: self._count(_quote(term)) for term in terms}
+        rare = [
+            term
+            for term, count in document_frequency.items()
+            if 0 < count <= self.rare_term_max_courses
+        ]
+        rows = self._match(" OR ".join(_quote(term) for term in terms), limit)
+        course_ids = _allowed(rows, allowed_course_ids)
+        scores = dict(rows)
+        return LexicalResult(
+            course_ids=course_ids,
+            # bm25()는 작을수록 관련도가 높으므로 부호를 바꿈
+            scores=[-scores[course_id] for course_id in course_ids],
+            strong=bool(rare) and bool(course_ids),
+        )
+
+    def _match(self, match: str, limit: int = -1) -> List[tuple]:
+        assert self.connection is not None
+        weights = ", ".join(map(str, self.BM25_WEIGHTS))
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT course_id, bm25({FTS_TABLE}, {weights}) AS score "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? ORDER BY score LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [(str(course_id), score) for course_id, score in rows]
+
+    def _count(self, match: str) -> int:
+        assert self.connection is not None
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?",
+                (match,),
+            ).fetchone()[0]
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _allowed(rows: List[tuple], allowed_course_ids: Optional[Set[str]]) -> List[str]:
+    return [
+        course_id
+        for course_id, _ in rows
+        if allowed_course_ids is None or course_id in allowed_course_ids
+    ]
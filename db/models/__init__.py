@@ -1,5 +1,6 @@
 # ruff: noqa: F401
 from db.models.base import Base
 from db.models.course import Course
+from db.models.crawl_progress import CrawlProgress
 from db.models.review import Review
 from db.models.review_stat import ReviewStat
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import String
+from sqlalchemy import BigInteger, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.models.base import Base
@@ -10,6 +10,11 @@ from db.models.review_stat import ReviewStat
 
 class Course(Base):
     __tablename__ = "course"
+    __table_args__ = (
+        Index(
+            "ix_course_course_no_course_class", "course_no", "course_class", unique=True
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     course_name: Mapped[str] = mapped_column(String(30))
@@ -20,6 +25,8 @@ class Course(Base):
     course_type: Mapped[str] = mapped_column(String(10))
     instructor: Mapped[str] = mapped_column(String(30))
     timeslot: Mapped[Optional[str]] = mapped_column(String(30))
+    # 요일 x 교시 bitmask (db.timeslot.parse_timeslot)
+    timeslot_mask: Mapped[Optional[int]] = mapped_column(BigInteger)
     room: Mapped[Optional[str]] = mapped_column(String(30))
     course_intro: Mapped[Optional[str]] = mapped_column(String(100))
     prerequisite: Mapped[Optional[str]] = mapped_column(String(100))
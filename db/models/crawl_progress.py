@@ -0,0 +1,19 @@
+from typing import Optional
+
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models.base import Base
+
+
+class CrawlProgress(Base):
+    __tablename__ = "crawl_progress"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    course_id: Mapped[int] = mapped_column(
+        ForeignKey("course.id"), index=True, unique=True
+    )
+    status: Mapped[str] = mapped_column(String(10))  # pending, done, failed
+    attempts: Mapped[int] = mapped_column(default=0)
+    error: Mapped[Optional[str]] = mapped_column(String(200))
+    updated_at: Mapped[float] = mapped_column()  # time.time()
@@ -1,14 +1,31 @@
-# ruff: noqa: F821
-from sqlalchemy import ForeignKey, String
+from typing import TYPE_CHECKING
+
+from sqlalchemy import ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db.models.base import Base
 
+if TYPE_CHECKING:
+    from db.models.course import Course
+
 
 class Review(Base):
     __tablename__ = "review"
+    # 다시 크롤링해도 같은 강의평은 같은 id를 유지하도록 (course_id, text, occurrence)로
+    # upsert. 같은 수업에 같은 문장("좋아요")의 강의평이 여러 개일 수 있으므로
+    # text만으로는 구분하지 않고 몇 번째로 나온 문장인지(occurrence)까지 사용
+    __table_args__ = (
+        Index(
+            "ix_review_course_id_text_occurrence",
+            "course_id",
+            "text",
+            "occurrence",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    course_id: Mapped[int] = mapped_column(ForeignKey("course.id"))
+    course_id: Mapped[int] = mapped_column(ForeignKey("course.id"), index=True)
     course: Mapped["Course"] = relationship(back_populates="reviews")
     text: Mapped[str] = mapped_column(String(1000))
+    occurrence: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -1,15 +1,21 @@
+from typing import TYPE_CHECKING
+
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-# ruff: noqa: F821
 from db.models.base import Base
 
+if TYPE_CHECKING:
+    from db.models.course import Course
+
 
 class ReviewStat(Base):
     __tablename__ = "review_stat"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    course_id: Mapped[int] = mapped_column(ForeignKey("course.id"))
+    course_id: Mapped[int] = mapped_column(
+        ForeignKey("course.id"), index=True, unique=True
+    )
     course: Mapped["Course"] = relationship(back_populates="review_stat")
 
     satisfaction: Mapped[float] = mapped_column()  # 만족도 (1~5)
@@ -0,0 +1,52 @@
+import re
+from typing import Iterable
+
+DAYS = "월화수목금토"
+PERIODS_PER_DAY = 10
+
+TIMESLOT_PATTERN = re.compile(r"([월화수목금토일])\((\d+)(?:-(\d+))?\)")
+
+
+def period_bit(day: str, period: int) -> int:
+    # 요일마다 PERIODS_PER_DAY 비트씩: 월 1교시가 bit 0, 토 10교시가 bit 59
+    return 1 << (DAYS.index(day) * PERIODS_PER_DAY + period - 1)
+
+
+def parse_timeslot(text: str) -> int:
+    """
+    Weekday x period bitmask of a timeslot string like "월(1-2) 수(3)".
+
+    Slots outside 월~토 / 1~PERIODS_PER_DAY교시 are ignored.
+    """
+    mask = 0
+    for day, start, end in TIMESLOT_PATTERN.findall(text or ""):
+        if day not in DAYS:
+            continue
+        for period in range(int(start), int(end or start) + 1):
+            if 1 <= period <= PERIODS_PER_DAY:
+                mask |= period_bit(day, period)
+    return mask
+
+
+def day_mask(days: Iterable[str]) -> int:
+    """
+    Every period of the given days, e.g. ``day_mask("금")`` for "no Friday classes".
+    """
+    mask = 0
+    for day in days:
+        for period in range(1, PERIODS_PER_DAY + 1):
+            mask |= period_bit(day, period)
+    return mask
+
+
+def format_timeslot(mask: int) -> str:
+    slots = []
+    for day in DAYS:
+        periods = [
+            period
+            for period in range(1, PERIODS_PER_DAY + 1)
+            if mask & period_bit(day, period)
+        ]
+        if periods:
+            slots.append(f"{day}({','.join(map(str, periods))})")
+    return " ".join(slots)
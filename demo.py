@@ -1,11 +1,18 @@
+from typing import Optional
+
 import gradio as gr
 
 from recsys import CourseRecommendationPipeline
 from agent import ChatBot
 
-recommender = CourseRecommendationPipeline(db_path="./vector_db/chroma")
+recommender = CourseRecommendationPipeline(
+    db_path="./vector_db/chroma",
+    split_cache_path="./split_cache.db",
+    lexical_db_path="./course.db",
+)
 print("Recommender initialized successfully")
 bot = ChatBot(pretrained_model_name="gpt-4-0125-preview")
+best_course: Optional[dict] = None
 best_reviews = ""
 NUM_RESULTS = 5  # align with the number of recommendations
 
@@ -72,18 +79,32 @@ with gr.Blocks() as app:
                         reviews,
                     ]
 
-    def on_submit(query):
-        output = recommender.recommend(query)
+    async def on_submit(query):
+        output = await recommender.recommend_async(query)
 
         global best_course
+        if not output:
+            # 조건(시간표, 강의평 통계)에 맞는 수업이 하나도 없는 경우
+            best_course = None
+            return [gr.update()] * len(data_components) + [
+                gr.Textbox("조건에 맞는 수업을 찾지 못했습니다.", label="Summary"),
+                gr.Row(visible=True),
+            ]
+
         best_course = output[0]
         best_reviews = "\n".join(best_course["review"])
         bot.history = ""
-        summarized_text = bot.summarize(
+        summarized_text = await bot.asummarize(
             info=best_course["info"], review=best_reviews, query=query
         )
         output_components = []
         for i in range(NUM_RESULTS):
+            if i >= len(output):
+                # 추천 결과가 NUM_RESULTS개보다 적으면 남는 tab은 숨김
+                output_components += [gr.Tab(visible=False)] + [gr.update()] * (
+                    len(data_components) // NUM_RESULTS - 1
+                )
+                continue
             course_output = output[i]
             output_components += [
                 gr.Tab(visible=True),
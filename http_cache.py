@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+def row_hash(row: dict) -> str:
+    return body_hash(json.dumps(row, ensure_ascii=False, sort_keys=True).encode())
+
+
+@dataclass
+class CacheEntry:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: str
+    details: dict
+    row_hash: Optional[str]
+
+
+class ResponseCache:
+    """
+    On-disk cache of crawled detail pages keyed by URL (which carries the
+    term, course_no and course_class).
+
+    Stores the validators (ETag / Last-Modified), a hash of the body, the
+    parsed result and a hash of the row last written to the DB, so a recrawl
+    can send conditional requests and skip parsing and writing unchanged pages.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "body_hash TEXT NOT NULL, details TEXT NOT NULL, row_hash TEXT, "
+            "fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, urls: List[str]) -> Dict[str, CacheEntry]:
+        entries = {}
+        for start in range(0, len(urls), 500):
+            chunk = urls[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for url, etag, last_modified, hashed, details, written in self.conn.execute(
+                "SELECT url, etag, last_modified, body_hash, details, row_hash "
+                f"FROM responses WHERE url IN ({placeholders})",
+                chunk,
+            ):
+                entries[url] = CacheEntry(
+                    etag, last_modified, hashed, json.loads(details), written
+                )
+        return entries
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> dict:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    @staticmethod
+    def is_unchanged(entry: Optional[CacheEntry], response: requests.Response) -> bool:
+        # 304이거나, validator가 없는 서버라도 body hash가 같으면 바뀌지 않은 것
+        if entry is None:
+            return False
+        return (
+            response.status_code == 304
+            or body_hash(response.content) == entry.body_hash
+        )
+
+    def put(self, url: str, response: requests.Response, details: dict):
+        self.conn.execute(
+            "INSERT INTO responses VALUES (?, ?, ?, ?, ?, NULL, ?) "
+            "ON CONFLICT(url) DO UPDATE SET etag=excluded.etag, "
+            "last_modified=excluded.last_modified, body_hash=excluded.body_hash, "
+            "details=excluded.details, fetched_at=excluded.fetched_at",
+            (
+                url,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                body_hash(response.content),
+                json.dumps(details, ensure_ascii=False),
+                time.time(),
+            ),
+        )
+
+    def touch(self, url: str, response: requests.Response):
+        # 304 응답에도 새 validator가 올 수 있으므로 갱신
+        self.conn.execute(
+            "UPDATE responses SET etag=coalesce(?, etag), "
+            "last_modified=coalesce(?, last_modified), fetched_at=? WHERE url=?",
+            (
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                time.time(),
+                url,
+            ),
+        )
+
+    def set_row_hashes(self, row_hashes: Dict[str, str]):
+        self.conn.executemany(
+            "UPDATE responses SET row_hash=? WHERE url=?",
+            [(hashed, url) for url, hashed in row_hashes.items()],
+        )
+
+    def commit(self):
+        self.conn.commit()
@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RateLimiter:
+    """
+    Per-host rate limit: requests to the same host are spaced at least
+    ``1 / requests_per_second`` seconds apart, across all threads.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1 / requests_per_second if requests_per_second else 0.0
+        self.lock = threading.Lock()
+        self.next_slot: Dict[str, float] = {}
+
+    def wait(self, host: str):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        # lock 밖에서 기다려야 다른 host 요청이 막히지 않음
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AdaptiveRateLimiter:
+    """
+    Delay between sequential requests that adapts to the server: it is
+    multiplied by ``backoff`` after an error or a response slower than
+    ``slow_response`` seconds, and by ``recovery`` after a fast success,
+    staying within ``[min_delay, max_delay]``.
+    """
+
+    def __init__(
+        self,
+        min_delay: float = 1.0,
+        max_delay: float = 300.0,
+        initial_delay: Optional[float] = None,
+        slow_response: float = 5.0,
+        backoff: float = 2.0,
+        recovery: float = 0.8,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min_delay if initial_delay is None else initial_delay
+        self.slow_response = slow_response
+        self.backoff = backoff
+        self.recovery = recovery
+        self.last_request: Optional[float] = None
+
+    def wait(self):
+        if self.last_request is not None:
+            remaining = self.last_request + self.delay - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        self.last_request = time.monotonic()
+
+    def success(self, elapsed: float):
+        if elapsed > self.slow_response:
+            self._set_delay(self.delay * self.backoff)
+        else:
+            self._set_delay(self.delay * self.recovery)
+
+    def failure(self):
+        self._set_delay(self.delay * self.backoff)
+
+    def _set_delay(self, delay: float):
+        self.delay = min(self.max_delay, max(self.min_delay, delay))
+
+
+class ConcurrentFetcher:
+    """
+    Fetches many URLs on a thread pool over one keep-alive ``requests.Session``.
+
+    Failed requests (connection errors, 429 and 5xx) are retried with
+    exponential backoff by urllib3. Only the network I/O happens here; parsing
+    is left to the caller.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        requests_per_second: float = 4.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 10.0,
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(requests_per_second)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+        )
+        # 스레드 수만큼 connection을 유지해서 매 요청마다 새로 연결하지 않도록
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        self.rate_limiter.wait(urlsplit(url).netloc)
+        response = self.session.get(url, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def fetch_all(
+        self, urls: List[str], headers: Optional[List[dict]] = None
+    ) -> Iterator[Tuple[int, Optional[requests.Response], Optional[Exception]]]:
+        """
+        Yield ``(index, response, error)`` in completion order. ``headers``
+        gives extra request headers per URL (e.g. conditional headers).
+        """
+        if headers is None:
+            headers = [{} for _ in urls]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self.get, url, headers=url_headers): i
+                for i, (url, url_headers) in enumerate(zip(urls, headers))
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except requests.RequestException as error:
+                    yield futures[future], None, error
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,95 @@
+import copy
+from typing import List, Tuple
+
+import lxml.html
+
+GRADE_MAP = {"기대 이상": 5, "보통": 3, "기대 이하": 1}
+ATTENDANCE_MAP = {
+    "매번함": 5,
+    "자주함": 4,
+    "종종함": 3,
+    "거의안함": 2,
+    "아예안함": 1,
+}
+
+REVIEW_LIST_XPATH = '//*[@id="root"]/div/div/section[3]/div/div/div[2]/div'
+STAT_XPATHS = {
+    "satisfaction": '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[1]/div[1]/span',
+    "attendance": '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[2]/div/div[1]/span',
+    "workload": '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[1]/div[1]/div[1]/span[2]',
+    "difficulty": '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[1]/div[2]/div[1]/span[2]',
+    "delivery": '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[2]/div[1]/div[1]/span[2]',
+    "achievement": '//*[@id="root"]/div/div/section[1]/div/div[3]/div/div[1]/div[3]/div[2]/div[2]/div[1]/span[2]',
+}
+
+
+class KLUEParseError(ValueError):
+    pass
+
+
+def parse_klue_page(page_source: str) -> Tuple[List[dict], dict]:
+    """
+    Parse reviews and review_stat out of a KLUE course page source.
+    """
+    root = lxml.html.fromstring(page_source)
+
+    review_list = root.xpath(REVIEW_LIST_XPATH)
+    if not review_list:
+        raise KLUEParseError("review list not found")
+
+    reviews: List[dict] = []
+    grades = []
+    for i, review_element in enumerate(review_list[0]):
+        try:
+            review_text, grade = _parse_review(review_element)
+        except KLUEParseError as error:
+            # 강의평 하나가 깨졌다고 수업 전체를 버리지는 않음
+            print(f"Skipping review {i}: {error}")
+            continue
+        grades.append(grade)
+        reviews.append({"text": review_text})
+
+    if not grades:
+        raise KLUEParseError("no reviews")
+
+    review_stat = {key: _parse_stat(root, key) for key in STAT_XPATHS}
+    review_stat["grade"] = round(sum(grades) / len(grades), 1)
+    return reviews, review_stat
+
+
+def _parse_review(review_element) -> Tuple[str, int]:
+    review_text = _first(review_element, "div/div/div[2]/div[1]")
+    grade_spans = review_element.xpath("div/div/div[2]/div[2]/span")
+    if not grade_spans:
+        raise KLUEParseError("grade not found")
+    grade_text = _text(grade_spans[-1]).replace("'", "")
+    if grade_text not in GRADE_MAP:
+        raise KLUEParseError(f"unknown grade {grade_text!r}")
+    return review_text, GRADE_MAP[grade_text]
+
+
+def _parse_stat(root, key: str) -> float:
+    value = _first(root, STAT_XPATHS[key])
+    if key == "attendance":
+        if value not in ATTENDANCE_MAP:
+            raise KLUEParseError(f"unknown attendance {value!r}")
+        return float(ATTENDANCE_MAP[value])
+    try:
+        return float(value)
+    except ValueError:
+        raise KLUEParseError(f"{key} is not a number: {value!r}") from None
+
+
+def _first(element, xpath: str) -> str:
+    found = element.xpath(xpath)
+    if not found:
+        raise KLUEParseError(f"{xpath} not found")
+    return _text(found[0])
+
+
+def _text(element) -> str:
+    # Selenium의 .text처럼 <br>은 줄바꿈으로 바꾸고 양쪽 공백 제거 (원본 tree는 그대로)
+    element = copy.deepcopy(element)
+    for br in element.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    return element.text_content().strip()
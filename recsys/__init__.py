@@ -1,2 +1,15 @@
 # ruff: noqa: F401
-from recsys.pipeline import CourseRecommendationOutput, CourseRecommendationPipeline
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from recsys.pipeline import CourseRecommendationOutput, CourseRecommendationPipeline
+
+
+def __getattr__(name: str):
+    # pipeline은 chromadb와 embedding model을 불러오므로, recsys.retriever 같은
+    # 하위 모듈만 쓸 때는 import하지 않도록 처음 접근할 때 불러옴
+    if name in ("CourseRecommendationOutput", "CourseRecommendationPipeline"):
+        from recsys import pipeline
+
+        return getattr(pipeline, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,41 @@
+import asyncio
 import json
+import os
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List
+from functools import partial
+from itertools import chain
+from typing import AbstractSet, Any, Dict, List, Optional, Set, Tuple
 
 import chromadb
 
-from recsys.embed_generator import EmbedGenerator
+from db.fts_index import LexicalIndex, LexicalResult
 from recsys.query_splitter import QuerySplitterOpenAI
-from recsys.retriever import ReciprocalRetriever
+from recsys.retriever import ReciprocalRetriever, slice_query_result
+from recsys.review_filter import ReviewStatFilter, parse_constraints
+from recsys.review_reranker import ReviewReranker
+from recsys.split_cache import SplitCache
+from recsys.timeslot_filter import TimeslotFilter
+from vector_db.embed_generator import EmbedGenerator
+from vector_db.memory_backend import SNAPSHOT_COLLECTIONS, MemoryClient
+from vector_db.versioning import VersionPointer, versioned_name
+
+
+@dataclass
+class ServingIndex:
+    version: Optional[str]
+    # Chroma collection 또는 MemoryCollection
+    course_db: Any
+    course_sentence_db: Any
+    review_db: Any
+    review_sentence_db: Any
+    review_reranker: ReviewReranker
+    review_stat_filter: ReviewStatFilter
+    timeslot_filter: TimeslotFilter
+    course_ids: Set[str]
 
 
 @dataclass
@@ -18,52 +46,165 @@ class CourseRecommendationOutput:
 
 
 class CourseRecommendationPipeline:
+    N_RESULTS = 256
+    RELEVANCE_THRESHOLD = 0.6
+    TOPK = 8
+    # 드문 단어가 BM25로 일치하면 dense 검색의 이웃 수를 줄임
+    SHRUNK_N_RESULTS = 64
+    LEXICAL_WEIGHT = 0.3
 
     def __init__(
         self,
         db_path,
+        split_cache_path: Optional[str] = None,
+        embedding_cache_path: Optional[str] = None,
+        max_workers: int = 4,
+        backend: str = "chroma",
+        snapshot_path: Optional[str] = None,
+        inference_mode: str = "fp32",
+        reload_interval: float = 5.0,
+        lexical_db_path: Optional[str] = None,
     ):
         # self.query_splitter = QuerySplitter()
+        self.split_cache = SplitCache(split_cache_path)
         self.query_splitter = QuerySplitterOpenAI(
-            pretrained_model_name="gpt-4-0125-preview"
+            pretrained_model_name="gpt-4-0125-preview", cache=self.split_cache
         )
         self.multiquery_retriever = ReciprocalRetriever()
-        self.embedding_model = EmbedGenerator()
-        self.chroma_client = chromadb.PersistentClient(
-            path=db_path,
-            settings=chromadb.Settings(allow_reset=True, anonymized_telemetry=False),
+        # 수업/리뷰 SQLite DB의 FTS5 인덱스 (DBMananger.build_fts_index로 생성)
+        self.lexical_index = (
+            LexicalIndex(lexical_db_path) if lexical_db_path is not None else None
         )
-
-        self.course_db = self.chroma_client.get_or_create_collection(
-            "course",
-            embedding_function=self.embedding_model,
-            metadata={"hnsw:space": "cosine"},
+        self.embedding_model = EmbedGenerator(
+            use_cache=True,
+            cache_path=embedding_cache_path,
+            inference_mode=inference_mode,
         )
+        # Chroma 조회, 임베딩처럼 blocking되는 작업은 이 executor에서만 실행
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.backend = backend
+        self.db_path = db_path
+        self.snapshot_path = snapshot_path
+        if backend == "memory":
+            self.version_pointer = None
+            self.chroma_client = None
+        elif backend == "chroma":
+            self.version_pointer = VersionPointer(db_path)
+            self.chroma_client = chromadb.PersistentClient(
+                path=db_path,
+                settings=chromadb.Settings(
+                    allow_reset=True, anonymized_telemetry=False
+                ),
+            )
+        else:
+            raise ValueError(f"Unknown vector db backend: {backend}")
 
-        self.course_sentence_db = self.chroma_client.get_or_create_collection(
-            "course_sentence",
-            embedding_function=self.embedding_model,
-            metadata={"hnsw:space": "cosine"},
-        )
+        # 요청 사이에 새 버전이 publish되었는지 확인 (reload_interval초에 한 번만 stat)
+        self.reload_interval = reload_interval
+        self._reload_lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._loaded_marker = self._version_marker()
+        self.index = self._load_index()
 
-        self.review_db = self.chroma_client.get_or_create_collection(
-            "review",
-            embedding_function=self.embedding_model,
-            metadata={"hnsw:space": "cosine"},
-        )
+    @property
+    def course_db(self):
+        return self.index.course_db
 
-        self.review_sentence_db = self.chroma_client.get_or_create_collection(
-            "review_sentence",
-            embedding_function=self.embedding_model,
-            metadata={"hnsw:space": "cosine"},
+    @property
+    def course_sentence_db(self):
+        return self.index.course_sentence_db
+
+    @property
+    def review_db(self):
+        return self.index.review_db
+
+    @property
+    def review_sentence_db(self):
+        return self.index.review_sentence_db
+
+    def _version_marker(self):
+        if self.backend == "memory":
+            assert self.snapshot_path is not None
+            return os.stat(self.snapshot_path).st_mtime_ns
+        assert self.version_pointer is not None
+        return self.version_pointer.mtime()
+
+    def _load_index(self) -> ServingIndex:
+        client: Any
+        if self.backend == "memory":
+            # 코퍼스가 작으므로 snapshot을 메모리에 올려 brute-force로 검색
+            assert self.snapshot_path is not None
+            client = MemoryClient.from_snapshot(self.snapshot_path)
+            version = None
+        else:
+            # 버전마다 collection 이름이 다르므로 새로 빌드된 HNSW 인덱스를 읽게 됨
+            assert self.version_pointer is not None
+            client = self.chroma_client
+            version = self.version_pointer.current()
+
+        # 없는 collection을 새로 만들면 빈 인덱스로 서비스하게 되므로 get만 사용
+        collections = {
+            name: client.get_collection(
+                versioned_name(name, version),
+                embedding_function=self.embedding_model,
+            )
+            for name in SNAPSHOT_COLLECTIONS
+        }
+        courses = collections["course"].get(include=["metadatas"])
+        return ServingIndex(
+            version=version,
+            course_db=collections["course"],
+            course_sentence_db=collections["course_sentence"],
+            review_db=collections["review"],
+            review_sentence_db=collections["review_sentence"],
+            review_reranker=ReviewReranker.from_collection(
+                collections["review_sentence"]
+            ),
+            review_stat_filter=ReviewStatFilter.from_metadatas(
+                courses["ids"], courses["metadatas"]
+            ),
+            timeslot_filter=TimeslotFilter.from_metadatas(
+                courses["ids"], courses["metadatas"]
+            ),
+            course_ids=set(courses["ids"]),
         )
 
-    def recommend(self, query, verbose: bool = False) -> CourseRecommendationOutput:
-        output = self.query_splitter.split(query)
-        queries = json.loads(output)
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """
+        Swap to a newly published index version. The embedding model, caches
+        and query splitter are kept; requests already running keep the
+        ``ServingIndex`` they started with.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+
+        marker = self._version_marker()
+        if not force and marker == self._loaded_marker:
+            return False
 
-        course_queries = queries["주제관련"]
-        review_queries = queries["평가관련"]
+        with self._reload_lock:
+            if not force and marker == self._loaded_marker:
+                return False
+            try:
+                index = self._load_index()
+            except Exception as error:
+                # pointer가 없거나 정리된 버전을 가리키면 지금 인덱스를 계속 사용
+                print(f"Failed to reload the vector index, keeping it: {error!r}")
+                return False
+            self.index, self._loaded_marker = index, marker
+        print(f"Vector index reloaded (version: {index.version})")
+        return True
+
+    def recommend(
+        self, query, verbose: bool = False, exclude_timeslot_mask: int = 0
+    ) -> List[Dict]:
+        self.reload_if_changed()
+        index = self.index
+
+        output = self.query_splitter.split(query)
+        course_queries, review_queries = self._parse_split_output(output)
 
         if verbose:
             print("내용관련 쿼리:", end="\t")
@@ -71,49 +212,34 @@ class CourseRecommendationPipeline:
             print("평가관련 쿼리:", end="\t")
             print(review_queries)
 
-        # course
-        course_ids, course_scores, _ = self.multiquery_retriever.query(
-            query_texts=course_queries,
-            vector_db=self.course_sentence_db,
-            relevance_threshold=0.6,
+        # course (평가관련 쿼리 중 학점, 출석 같은 조건은 review_stat으로 먼저 거름)
+        allowed_course_ids = self._allowed_course_ids(
+            review_queries, index, exclude_timeslot_mask
+        )
+        course_ids, course_scores, _ = self._retrieve_courses(
+            course_queries, index, allowed_course_ids
         )
 
         if verbose:
             print("\n 수업의 내용과 관련된 추천 결과:")
+            courses = get_by_ids(index.course_db, list(course_ids))
             for id in course_ids:
-                metadata = self.course_db.get(ids=id)["metadatas"][0]
+                _, metadata = courses[id]
                 print(
                     "\t" + metadata["instructor"], "교수님의 ", metadata["course_name"]
                 )
 
         # review
-        reranked_ids, reranked_scores, representative_review_ids = (
-            self.multiquery_retriever.query(
-                query_texts=review_queries,
-                course_ids=course_ids,
-                vector_db=self.review_sentence_db,
-                relevance_threshold=0.6,
-            )
+        review_result = self._retrieve_reviews(
+            course_ids, index, query_texts=review_queries
         )
+        output = self._rerank(course_ids, course_scores, *review_result)
 
-        final_score = defaultdict(float)
-        for id in reranked_ids:
-            final_score[id] += course_scores[course_ids.index(id)] * 0.65
-            final_score[id] += reranked_scores[reranked_ids.index(id)] * 0.35
-
-        final_score = sorted(final_score.items(), key=lambda x: x[1], reverse=True)
-        course_ids, course_scores = zip(*final_score)
-
-        output = CourseRecommendationOutput(
-            course_ids=course_ids,
-            course_scores=course_scores,
-            representative_review_ids=representative_review_ids,
-        )
+        full_output = self.get_full_output(output, index)
 
         if verbose:
             print("\n 수업의 리뷰과 관련된 내용으로 리랭킹한 결과:")
-            qa_input = self.get_full_output(output)
-            for id, info in qa_input.items():
+            for info in full_output:
                 print(f'\t 수업 제목 : {info["course_name"]}')
                 print(f'\t 강의자 : {info["instructor"]}')
                 print(f'\t 점수 : {info["score"]}')
@@ -122,30 +248,345 @@ class CourseRecommendationPipeline:
                     print("\t\t" + review.replace("\n", " "))
                 print("\n")
 
-        full_output = self.get_full_output(output)
         return full_output
 
+    async def recommend_async(
+        self, query, exclude_timeslot_mask: int = 0
+    ) -> List[Dict]:
+        loop = asyncio.get_running_loop()
+        # 새 버전을 읽는 동안 event loop가 멈추지 않도록 executor에서 확인
+        await loop.run_in_executor(self.executor, self.reload_if_changed)
+        index = self.index
+
+        output = await self.query_splitter.asplit(query)
+        course_queries, review_queries = self._parse_split_output(output)
+
+        # 평가관련 쿼리의 임베딩은 수업 후보와 무관하므로 수업 검색과 동시에 계산
+        allowed_course_ids = self._allowed_course_ids(
+            review_queries, index, exclude_timeslot_mask
+        )
+        course_result, review_embeddings = await asyncio.gather(
+            loop.run_in_executor(
+                self.executor,
+                self._retrieve_courses,
+                course_queries,
+                index,
+                allowed_course_ids,
+            ),
+            loop.run_in_executor(self.executor, self.embedding_model, review_queries),
+        )
+        course_ids, course_scores, _ = course_result
+
+        review_result = await loop.run_in_executor(
+            self.executor,
+            partial(
+                self._retrieve_reviews,
+                course_ids,
+                index,
+                query_embeddings=review_embeddings,
+            ),
+        )
+        output = self._rerank(course_ids, course_scores, *review_result)
+
+        return await loop.run_in_executor(
+            self.executor, self.get_full_output, output, index
+        )
+
+    def recommend_many(
+        self,
+        queries: List[str],
+        exclude_timeslot_masks: Optional[List[int]] = None,
+    ) -> List[List[Dict]]:
+        if exclude_timeslot_masks is None:
+            exclude_timeslot_masks = [0] * len(queries)
+
+        self.reload_if_changed()
+        index = self.index
+
+        outputs = list(self.executor.map(self.query_splitter.split, queries))
+        split_queries = [self._parse_split_output(output) for output in outputs]
+
+        # 모든 사용자의 하위 쿼리를 한 번에 임베딩하고, 수업 검색도 한 번에 수행
+        course_queries = [q for course_q, _ in split_queries for q in course_q]
+        review_queries = [q for _, review_q in split_queries for q in review_q]
+        embeddings = self.embedding_model(course_queries + review_queries)
+        course_embeddings = embeddings[: len(course_queries)]
+        review_embeddings = embeddings[len(course_queries) :]
+
+        # recommend와 같은 결과가 나오도록 사용자마다 lexical 결과로 dense 검색을
+        # 건너뛰거나 이웃 수를 정하고, n_results와 후보 수업이 같은 쿼리끼리 묶어서
+        # 한 번에 검색
+        plans = []
+        course_start = 0
+        for (course_q, review_q), exclude_timeslot_mask in zip(
+            split_queries, exclude_timeslot_masks
+        ):
+            allowed_course_ids = self._allowed_course_ids(
+                review_q, index, exclude_timeslot_mask
+            )
+            lexical = self._search_lexical(course_q, index, allowed_course_ids)
+            plans.append(
+                (
+                    course_start,
+                    course_start + len(course_q),
+                    allowed_course_ids,
+                    lexical,
+                )
+            )
+            course_start += len(course_q)
+
+        groups = defaultdict(list)
+        for i, (_, _, allowed_course_ids, lexical) in enumerate(plans):
+            if not lexical.exact:
+                allowed_key = (
+                    None
+                    if allowed_course_ids is None
+                    else frozenset(allowed_course_ids)
+                )
+                groups[(self._dense_n_results(lexical), allowed_key)].append(i)
+        dense_results = {}
+        for (n_results, allowed_key), users in groups.items():
+            rows = [row for i in users for row in range(plans[i][0], plans[i][1])]
+            result = self._query_course_sentences(
+                index,
+                n_results,
+                allowed_key,
+                query_embeddings=[course_embeddings[row] for row in rows],
+            )
+            start = 0
+            for i in users:
+                end = start + plans[i][1] - plans[i][0]
+                dense_results[i] = slice_query_result(result, start, end)
+                start = end
+
+        full_outputs = []
+        review_start = 0
+        for i, (course_q, review_q) in enumerate(split_queries):
+            review_end = review_start + len(review_q)
+
+            course_ids, course_scores, _ = self._fuse_courses(
+                dense_results.get(i, empty_query_result()), plans[i][3]
+            )
+            review_result = self._retrieve_reviews(
+                course_ids,
+                index,
+                query_embeddings=review_embeddings[review_start:review_end],
+            )
+            output = self._rerank(course_ids, course_scores, *review_result)
+            full_outputs.append(self.get_full_output(output, index))
+
+            review_start = review_end
+
+        return full_outputs
+
+    def _parse_split_output(self, output: str) -> Tuple[List[str], List[str]]:
+        queries = json.loads(output)
+        return queries["주제관련"], queries["평가관련"]
+
+    def _allowed_course_ids(
+        self,
+        review_queries: List[str],
+        index: ServingIndex,
+        exclude_timeslot_mask: int = 0,
+    ) -> Optional[Set[str]]:
+        predicates = parse_constraints(review_queries)
+        allowed_course_ids = index.review_stat_filter.allowed_course_ids(predicates)
+        if allowed_course_ids is not None and not allowed_course_ids:
+            # 조건을 모두 만족하는 수업이 없으면 필터 없이 추천
+            print(f"No course satisfies {predicates}, ignoring review_stat filter")
+            allowed_course_ids = None
+
+        # 시간표와 겹치는 수업은 항상 제외 (사용자가 직접 지정한 조건)
+        free_course_ids = index.timeslot_filter.allowed_course_ids(
+            exclude_timeslot_mask
+        )
+        if free_course_ids is None:
+            return allowed_course_ids
+        if allowed_course_ids is None:
+            return free_course_ids
+        return allowed_course_ids & free_course_ids
+
+    def _retrieve_courses(
+        self,
+        course_queries: List[str],
+        index: ServingIndex,
+        allowed_course_ids: Optional[Set[str]] = None,
+    ):
+        lexical = self._search_lexical(course_queries, index, allowed_course_ids)
+        result = empty_query_result()
+        if not lexical.exact:
+            result = self._query_course_sentences(
+                index,
+                self._dense_n_results(lexical),
+                allowed_course_ids,
+                query_texts=course_queries,
+            )
+        return self._fuse_courses(result, lexical)
+
+    def _query_course_sentences(
+        self,
+        index: ServingIndex,
+        n_results: int,
+        allowed_course_ids: Optional[AbstractSet[str]],
+        **query,
+    ) -> Dict[str, List[List]]:
+        n_queries = len(
+            query["query_texts"]
+            if "query_texts" in query
+            else query["query_embeddings"]
+        )
+        if not n_queries or (allowed_course_ids is not None and not allowed_course_ids):
+            return empty_query_result()
+        # 조건에 맞는 수업의 문장 안에서만 이웃을 찾도록 필터를 검색에 넘김
+        where = (
+            None
+            if allowed_course_ids is None
+            else {"course_id": {"$in": sorted(allowed_course_ids)}}
+        )
+        return index.course_sentence_db.query(n_results=n_results, where=where, **query)
+
+    def _dense_n_results(self, lexical: LexicalResult) -> int:
+        return self.SHRUNK_N_RESULTS if lexical.strong else self.N_RESULTS
+
+    def _fuse_courses(self, result: Dict[str, List[List]], lexical: LexicalResult):
+        """
+        Course ranking from a dense ``course_sentence`` result and BM25.
+        """
+        if lexical.exact:
+            # 학수번호로 찾은 수업은 dense 검색 없이 바로 사용
+            return self._fuse_lexical(((), (), {}), lexical)
+
+        dense = self.multiquery_retriever.fuse(
+            result,
+            topk=self.TOPK,
+            relevance_threshold=self.RELEVANCE_THRESHOLD,
+        )
+        return self._fuse_lexical(dense, lexical)
+
+    def _search_lexical(
+        self,
+        course_queries: List[str],
+        index: ServingIndex,
+        allowed_course_ids: Optional[Set[str]],
+    ) -> LexicalResult:
+        if self.lexical_index is None:
+            return LexicalResult()
+        # SQLite에는 있지만 아직 vector index에 없는 수업은 제외
+        return self.lexical_index.search(
+            course_queries,
+            allowed_course_ids=(
+                index.course_ids
+                if allowed_course_ids is None
+                else allowed_course_ids & index.course_ids
+            ),
+        )
+
+    def _fuse_lexical(self, dense, lexical: LexicalResult):
+        """
+        Weighted reciprocal-rank fusion of the dense course ranking and BM25.
+        """
+        course_ids, course_scores, supporting_ids = dense
+        if lexical.exact:
+            n = min(len(lexical.course_ids), self.TOPK)
+            return tuple(lexical.course_ids[:n]), tuple([1.0] * n), supporting_ids
+        if not lexical.course_ids:
+            return dense
+
+        final_score: Dict[str, float] = defaultdict(float)
+        for id, score in zip(course_ids, course_scores):
+            final_score[id] += score * (1 - self.LEXICAL_WEIGHT)
+        for rank, id in enumerate(lexical.course_ids):
+            final_score[id] += self.LEXICAL_WEIGHT / (rank + 1)
+
+        ranked = sorted(final_score.items(), key=lambda x: x[1], reverse=True)
+        ranked = ranked[: self.TOPK]
+        return (
+            tuple(id for id, _ in ranked),
+            tuple(score for _, score in ranked),
+            supporting_ids,
+        )
+
+    def _retrieve_reviews(
+        self,
+        course_ids: List[str],
+        index: ServingIndex,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[List[List[float]]] = None,
+    ):
+        # 후보 수업의 리뷰 문장만 정확하게 계산 (Chroma where 필터 대신)
+        if query_embeddings is None:
+            query_embeddings = self.embedding_model(query_texts)
+        result = index.review_reranker.query(
+            query_embeddings, course_ids, n_results=self.N_RESULTS
+        )
+        return self.multiquery_retriever.fuse(
+            result, relevance_threshold=self.RELEVANCE_THRESHOLD
+        )
+
+    def _rerank(
+        self,
+        course_ids: List[str],
+        course_scores: List[float],
+        reranked_ids: List[str],
+        reranked_scores: List[float],
+        representative_review_ids: Dict[str, List[str]],
+    ) -> CourseRecommendationOutput:
+        final_score: Dict[str, float] = defaultdict(float)
+        for id in reranked_ids:
+            final_score[id] += course_scores[course_ids.index(id)] * 0.65
+            final_score[id] += reranked_scores[reranked_ids.index(id)] * 0.35
+
+        ranked = sorted(final_score.items(), key=lambda x: x[1], reverse=True)
+
+        return CourseRecommendationOutput(
+            course_ids=[id for id, _ in ranked],
+            course_scores=[score for _, score in ranked],
+            representative_review_ids=representative_review_ids,
+        )
+
     def get_full_output(
-        self, recommendation_output: CourseRecommendationOutput
+        self,
+        recommendation_output: CourseRecommendationOutput,
+        index: Optional[ServingIndex] = None,
     ) -> List[Dict]:
-        full_output = []
+        if index is None:
+            index = self.index
 
-        for i in range(len(recommendation_output.course_ids)):
-            course_id = recommendation_output.course_ids[i]
-            course_score = recommendation_output.course_scores[i]
+        course_ids = list(recommendation_output.course_ids)
+        review_sentence_ids = {
+            course_id: recommendation_output.representative_review_ids.get(
+                course_id, []
+            )
+            for course_id in course_ids
+        }
 
-            info = self.course_db.get(ids=course_id)
-            metadata = info["metadatas"][0]
+        # 수업마다 따로 get을 호출하지 않고, collection별로 한 번씩만 조회
+        courses = get_by_ids(index.course_db, course_ids)
+        review_sentences = get_by_ids(
+            index.review_sentence_db,
+            list(dict.fromkeys(chain.from_iterable(review_sentence_ids.values()))),
+        )
 
-            review_ids = set()
-            for review_sentence_id in recommendation_output.representative_review_ids[
-                course_id
-            ]:
-                review_id = self.review_sentence_db.get(ids=review_sentence_id)[
-                    "metadatas"
-                ][0]["review_id"]
-                review_ids.add(review_id)
-            review_ids = list(review_ids)
+        review_ids = {
+            course_id: list(
+                dict.fromkeys(
+                    review_sentences[review_sentence_id][1]["review_id"]
+                    for review_sentence_id in review_sentence_ids[course_id]
+                    if review_sentence_id in review_sentences
+                )
+            )
+            for course_id in course_ids
+        }
+        reviews = get_by_ids(
+            index.review_db,
+            list(dict.fromkeys(chain.from_iterable(review_ids.values()))),
+        )
+
+        full_output = []
+        for course_id, course_score in zip(
+            course_ids, recommendation_output.course_scores
+        ):
+            document, metadata = courses[course_id]
 
             each_input = {
                 "score": course_score,
@@ -161,9 +602,33 @@ class CourseRecommendationPipeline:
                 "course_intro": metadata["course_intro"],
                 "prerequisite": metadata["prerequisite"],
                 "syllabus": metadata["syllabus"],
-                "info": info["documents"],  # intro + prerequisite + syllabus
-                "review": self.review_db.get(ids=review_ids)["documents"],
+                "info": [document],  # intro + prerequisite + syllabus
+                "review": [
+                    reviews[review_id][0]
+                    for review_id in review_ids[course_id]
+                    if review_id in reviews
+                ],
             }
             full_output.append(each_input)
 
         return full_output
+
+
+def empty_query_result() -> Dict[str, List[List]]:
+    return {"ids": [], "distances": [], "metadatas": []}
+
+
+def get_by_ids(collection, ids: List[str]) -> Dict[str, Tuple[str, Dict]]:
+    """
+    Fetch documents and metadatas for ``ids`` with a single ``get`` call.
+    """
+    if not ids:
+        return {}
+
+    result = collection.get(ids=ids)
+    return {
+        id: (document, metadata)
+        for id, document, metadata in zip(
+            result["ids"], result["documents"], result["metadatas"]
+        )
+    }
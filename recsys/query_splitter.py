@@ -1,11 +1,14 @@
 import os
+from typing import Optional
 
 import torch
 from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
 
+from recsys.split_cache import SplitCache
+
 
 class QuerySplitter:
 
@@ -121,14 +124,49 @@ class QuerySplitterOpenAI:
     def __init__(
         self,
         pretrained_model_name="gpt-3.5-turbo",
+        cache: Optional[SplitCache] = None,
     ):
 
         load_dotenv()
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.pretrained_model_name = pretrained_model_name
         self.prompt_template = self._create_prompt_template()
+        self.cache = cache
 
     def split(self, query):
+        if self.cache is not None:
+            output = self.cache.get(query)
+            if output is not None:
+                return output
+
+        response = self.client.chat.completions.create(
+            model=self.pretrained_model_name,
+            messages=self._get_messages(query),
+        )
+        output = response.choices[0].message.content
+
+        if self.cache is not None:
+            self.cache.put(query, output)
+        return output
+
+    async def asplit(self, query):
+        if self.cache is not None:
+            output = self.cache.get(query)
+            if output is not None:
+                return output
+
+        response = await self.async_client.chat.completions.create(
+            model=self.pretrained_model_name,
+            messages=self._get_messages(query),
+        )
+        output = response.choices[0].message.content
+
+        if self.cache is not None:
+            self.cache.put(query, output)
+        return output
+
+    def _get_messages(self, query):
         prompt = self.prompt_template.format_prompt(query=query.strip()).to_string()
         messages = [
             {
@@ -137,14 +175,7 @@ class QuerySplitterOpenAI:
             },
             {"role": "user", "content": prompt},
         ]
-
-        response = self.client.chat.completions.create(
-            model=self.pretrained_model_name,
-            messages=messages,
-        )
-        output = response.choices[0].message.content
-
-        return output
+        return messages
 
     def _create_prompt_template(self):
         template = """
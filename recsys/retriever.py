@@ -1,26 +1,30 @@
 from collections import defaultdict
+from itertools import chain
 from queue import PriorityQueue
-from typing import Callable, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from scipy.stats import rankdata
 
 
 class ReciprocalRetriever:
     @staticmethod
     def query(
-        query_texts: List[str],
-        vector_db: Callable,
+        query_texts: Optional[List[str]],
+        vector_db: Any,
         topk: Optional[int] = 8,
         n_example_per_query: Optional[int] = 4,
         course_ids: Optional[List[str]] = None,
         k: Optional[int] = 256,
         relevance_threshold: Optional[float] = 0.5,
+        query_embeddings: Optional[List[List[float]]] = None,
     ):
-
-        course_score = defaultdict(list)
-        supporting_id = defaultdict(list)
-
-        kwargs = {"query_texts": query_texts}
+        # 미리 계산된 임베딩이 있으면 collection의 embedding function을 건너뜀
+        kwargs: Dict[str, Any]
+        if query_embeddings is not None:
+            kwargs = {"query_embeddings": query_embeddings}
+        else:
+            kwargs = {"query_texts": query_texts}
         if k is not None:
             kwargs["n_results"] = k
         if course_ids is not None:
@@ -28,6 +32,166 @@ class ReciprocalRetriever:
 
         result = vector_db.query(**kwargs)
 
+        return ReciprocalRetriever.fuse(
+            result,
+            topk=topk,
+            n_example_per_query=n_example_per_query,
+            relevance_threshold=relevance_threshold,
+        )
+
+    @staticmethod
+    def fuse(
+        result: Dict[str, List[List]],
+        topk: Optional[int] = 8,
+        n_example_per_query: Optional[int] = 4,
+        relevance_threshold: Optional[float] = 0.5,
+    ):
+        """
+        Reciprocal rank fusion over a Chroma query result (one row per query).
+
+        Every hit becomes one row of flat (query, course, distance) arrays and
+        the per-query steps of ``_fuse_python`` are done as grouped array
+        operations over all queries at once.
+        """
+        supporting_id: Dict[str, List[str]] = defaultdict(list)
+
+        ids = [id for row in result["ids"] for id in row]
+        n_hits = len(ids)
+        n_queries = len(result["distances"])
+        if n_hits == 0:
+            return (), (), supporting_id
+
+        lengths = [len(row) for row in result["distances"]]
+        query_idx = np.repeat(np.arange(n_queries), lengths)
+        distances = np.array(
+            list(chain.from_iterable(result["distances"])), dtype=np.float64
+        )
+        # 문자열 순서대로 번호를 매겨 PriorityQueue의 tie-break 순서와 맞춤
+        course_names, course_idx = _string_ranks(
+            [m["course_id"] for row in result["metadatas"] for m in row]
+        )
+        n_courses = len(course_names)
+        pair = query_idx * n_courses + course_idx
+
+        # 평균 연산에는 일정 수준 이상 관련있는 문장만 들어가도록!
+        if relevance_threshold:
+            below = ~(distances > relevance_threshold)
+        else:
+            below = np.ones(n_hits, dtype=bool)
+
+        # threshold 이하인 문장: 수업별로 앞에서부터 n_example_per_query개만 근거로 사용
+        below_idx = np.flatnonzero(below)
+        below_sorted = below_idx[np.argsort(pair[below_idx], kind="stable")]
+        is_first_below = _group_starts(pair[below_sorted])
+        within_rank = np.arange(len(below_sorted)) - _propagate_starts(is_first_below)
+        support_below = below_sorted[within_rank < n_example_per_query]
+        first_below = below_sorted[is_first_below]
+
+        has_below = np.zeros(n_queries * n_courses, dtype=bool)
+        has_below[pair[first_below]] = True
+        n_below_courses = np.bincount(query_idx[first_below], minlength=n_queries)
+
+        # threshold 이슈로 topk보다 적은 경우: (relevance, course_id, id) 순으로
+        # 수업 수가 topk가 될 때까지 threshold를 넘는 문장을 추가
+        over_idx = np.flatnonzero(~below)
+        _, id_rank = _string_ranks([ids[i] for i in over_idx.tolist()])
+        over_idx = over_idx[
+            np.lexsort(
+                (
+                    id_rank,
+                    course_idx[over_idx],
+                    distances[over_idx],
+                    query_idx[over_idx],
+                )
+            )
+        ]
+        over_pair = pair[over_idx]
+        is_new = np.zeros(len(over_idx), dtype=bool)
+        is_new[np.unique(over_pair, return_index=True)[1]] = True
+        is_new &= ~has_below[over_pair]
+
+        over_query = query_idx[over_idx]
+        new_before = np.cumsum(is_new) - is_new
+        new_before -= new_before[_propagate_starts(_group_starts(over_query))]
+        popped = (n_below_courses[over_query] + new_before) < topk
+        popped_idx = over_idx[popped]
+
+        # 수업별 평균 relevance (threshold 이하 문장 → 추가된 문장 순서로 합산)
+        contrib = np.concatenate([below_idx, popped_idx])
+        n_pairs = n_queries * n_courses
+        sums = np.bincount(pair[contrib], weights=distances[contrib], minlength=n_pairs)
+        counts = np.bincount(pair[contrib], minlength=n_pairs)
+        active = np.flatnonzero(counts)
+        mean_relevance = sums[active] / counts[active]
+        active_query, active_course = np.divmod(active, n_courses)
+
+        # rankdata(method="min")
+        order = np.lexsort((mean_relevance, active_query))
+        is_new_value = _group_starts(active_query[order]) | _group_starts(
+            mean_relevance[order]
+        )
+        ranks = np.empty(len(active), dtype=np.int64)
+        ranks[order] = (
+            _propagate_starts(is_new_value)
+            - _propagate_starts(_group_starts(active_query[order]))
+            + 1
+        )
+
+        course_score = (
+            np.bincount(active_course, weights=1 / ranks, minlength=n_courses)
+            / n_queries
+        )
+
+        # 동점인 수업은 처음 등장한 순서를 유지 (dict 삽입 순서와 동일)
+        first_seen = np.full(n_pairs, np.iinfo(np.int64).max, dtype=np.int64)
+        first_seen[pair[first_below]] = first_below
+        popped_new = popped_idx[is_new[popped]]
+        first_seen[pair[popped_new]] = n_hits + np.flatnonzero(is_new & popped)
+        seen_key = active_query * (2 * n_hits) + first_seen[active]
+        seen_order = np.lexsort((seen_key, active_course))
+        seen_course = active_course[seen_order]
+        first_of_course = seen_order[_group_starts(seen_course)]
+        course_seen_key = np.empty(n_courses, dtype=np.int64)
+        course_seen_key[active_course[first_of_course]] = seen_key[first_of_course]
+
+        scored = np.unique(active_course)
+        scored = scored[np.lexsort((course_seen_key[scored], -course_score[scored]))]
+        scored = scored[:topk]
+
+        # 근거 문장: 쿼리 순서대로, 쿼리 안에서는 threshold 이하 문장 → 추가된 문장 순
+        support = np.concatenate([support_below, popped_idx])
+        support_key = np.concatenate(
+            [
+                query_idx[support_below] * (2 * n_hits) + support_below,
+                query_idx[popped_idx] * (2 * n_hits) + n_hits + np.flatnonzero(popped),
+            ]
+        )
+        support = support[np.lexsort((support_key, course_idx[support]))]
+        support_course = course_idx[support]
+        bounds = np.flatnonzero(_group_starts(support_course)).tolist()
+        support_ids = [ids[i] for i in support.tolist()]
+        for start, end in zip(bounds, bounds[1:] + [len(support_ids)]):
+            supporting_id[course_names[support_course[start]]] = support_ids[start:end]
+
+        return (
+            tuple(course_names[i] for i in scored.tolist()),
+            tuple(course_score[scored].tolist()),
+            supporting_id,
+        )
+
+    @staticmethod
+    def _fuse_python(
+        result: Dict[str, List[List]],
+        topk: Optional[int] = 8,
+        n_example_per_query: Optional[int] = 4,
+        relevance_threshold: Optional[float] = 0.5,
+    ):
+        """
+        Loop-based reference implementation of ``fuse``, kept for benchmarks.
+        """
+        course_score: Dict[str, List[float]] = defaultdict(list)
+        supporting_id: Dict[str, List[str]] = defaultdict(list)
+
         course_ids = [
             list(map(lambda x: x["course_id"], i)) for i in result["metadatas"]
         ]
@@ -35,10 +199,10 @@ class ReciprocalRetriever:
         relevances = result["distances"]
 
         for query_i in range(len(relevances)):
-            rel_over_query = defaultdict(list)
-            supporting_id_over_query = defaultdict(list)
+            rel_over_query: Dict[str, List[float]] = defaultdict(list)
+            supporting_id_over_query: Dict[str, List[str]] = defaultdict(list)
 
-            queue = PriorityQueue()
+            queue: PriorityQueue[Tuple[float, str, str]] = PriorityQueue()
 
             for i in range(len(relevances[query_i])):
                 id = ids[query_i][i]
@@ -50,38 +214,77 @@ class ReciprocalRetriever:
                     queue.put((relevance, course_id, id))
                     continue
                 rel_over_query[course_id].append(relevance)
-                if len(supporting_id_over_query[course_id]) < n_example_per_query:
+                if (
+                    n_example_per_query is None
+                    or len(supporting_id_over_query[course_id]) < n_example_per_query
+                ):
                     supporting_id_over_query[course_id].append(id)
 
             # threshold 이슈로 topk보다 적은 경우
             while (not queue.empty()) and (
-                len(supporting_id_over_query.values()) < topk
+                topk is None or len(supporting_id_over_query.values()) < topk
             ):
                 relevance, course_id, id = queue.get()
                 rel_over_query[course_id].append(relevance)
                 supporting_id_over_query[course_id].append(id)
 
-            for key in rel_over_query:
-                rel_over_query[key] = sum(rel_over_query[key]) / len(
-                    rel_over_query[key]
-                )
+            mean_rel_over_query = {
+                key: sum(values) / len(values) for key, values in rel_over_query.items()
+            }
 
-            ranks = rankdata(list(rel_over_query.values()), method="min", axis=0)
+            ranks = rankdata(list(mean_rel_over_query.values()), method="min", axis=0)
             for i in range(len(ranks)):
-                course_id = list(rel_over_query.keys())[i]
+                course_id = list(mean_rel_over_query.keys())[i]
                 score = 1 / ranks[i]
                 course_score[course_id].append(score)
 
             for key in supporting_id_over_query:
                 supporting_id[key] += supporting_id_over_query[key]
 
-        for key in course_score.keys():
-            course_score[key] = (
-                (sum(course_score[key]) / len(query_texts)) if course_score[key] else 0
-            )
+        mean_course_score = {
+            key: (sum(scores) / len(relevances)) if scores else 0
+            for key, scores in course_score.items()
+        }
 
-        course_id, course_score = zip(
-            *sorted(course_score.items(), key=lambda x: x[1], reverse=True)
+        ranked_ids, ranked_scores = zip(
+            *sorted(mean_course_score.items(), key=lambda x: x[1], reverse=True)
         )
 
-        return course_id[:topk], course_score[:topk], supporting_id
+        return ranked_ids[:topk], ranked_scores[:topk], supporting_id
+
+
+def slice_query_result(
+    result: Dict[str, List[List]], start: int, end: int
+) -> Dict[str, List[List]]:
+    """
+    Take the rows for queries ``start:end`` out of a batched Chroma query result.
+    """
+    return {
+        key: value[start:end] if isinstance(value, list) else value
+        for key, value in result.items()
+    }
+
+
+def _string_ranks(values: List[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Sorted distinct strings, and each value's index into them.
+    """
+    names = sorted(set(values))
+    lookup = {name: i for i, name in enumerate(names)}
+    return names, np.array([lookup[value] for value in values], dtype=np.int64)
+
+
+def _group_starts(values: np.ndarray) -> np.ndarray:
+    """
+    Mark the first element of every run of equal values in a sorted array.
+    """
+    starts = np.ones(len(values), dtype=bool)
+    starts[1:] = values[1:] != values[:-1]
+    return starts
+
+
+def _propagate_starts(starts: np.ndarray) -> np.ndarray:
+    """
+    For every element, the index of the run start it belongs to.
+    """
+    return np.maximum.accumulate(np.where(starts, np.arange(len(starts)), 0))
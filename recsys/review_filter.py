@@ -0,0 +1,157 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from vector_db.utils import REVIEW_STAT_COLUMNS
+
+
+@dataclass(frozen=True)
+class StatPredicate:
+    column: str
+    op: str  # ">=" 또는 "<="
+    value: float
+
+
+# (정규식, 컬럼, 연산자, 값) - 같은 컬럼은 먼저 매칭된 패턴만 사용하므로
+# "어렵지 않은"처럼 부정형이 들어간 패턴을 앞에 둠. "쉽게 설명"처럼 평가가 아닌
+# 표현은 걸러지지 않도록 평가 대상(학점, 출석, 과제, 수업 등)에 붙은 표현만 매칭
+_PARTICLE = r"[은는이가을를도]?\s*"
+_SUBJECT = r"(수업|과목|강의|시험|내용)"
+CONSTRAINT_PATTERNS = [
+    (
+        rf"학점{_PARTICLE}(짜|박하|박한|(잘\s*)?안\s*(주|나오)|낮)",
+        "grade",
+        "<=",
+        2.5,
+    ),
+    (
+        rf"학점{_PARTICLE}(잘\s*(주|나오|받)|후하|후한|높|좋)",
+        "grade",
+        ">=",
+        3.5,
+    ),
+    (
+        rf"출석(\s*체크)?{_PARTICLE}((거의|자주|잘)\s*)?(안\s*(부르|하|체크)"
+        r"|(부르|하|체크하)지\s*(는\s*)?않|없)",
+        "attendance",
+        "<=",
+        2.0,
+    ),
+    (
+        rf"출석(\s*체크)?{_PARTICLE}(매번|매일|철저|꼼꼼|자주)",
+        "attendance",
+        ">=",
+        4.0,
+    ),
+    (
+        rf"(과제|학습량|공부량){_PARTICLE}(적(은|고|다|어|게)|거의\s*없|없|많지\s*않)"
+        r"|널널|꿀강",
+        "workload",
+        "<=",
+        2.5,
+    ),
+    (rf"(과제|학습량|공부량){_PARTICLE}많", "workload", ">=", 3.5),
+    (
+        rf"어렵지\s*않|난이도{_PARTICLE}낮|쉬운\s*{_SUBJECT}|{_SUBJECT}{_PARTICLE}(쉽|쉬운|쉬워)",
+        "difficulty",
+        "<=",
+        2.5,
+    ),
+    (
+        rf"난이도{_PARTICLE}높|어려운\s*{_SUBJECT}|{_SUBJECT}{_PARTICLE}(어렵|어려운|어려워)",
+        "difficulty",
+        ">=",
+        3.5,
+    ),
+    (
+        rf"(강의력|설명){_PARTICLE}(좋|최고|훌륭|뛰어)|설명을?\s*잘|잘\s*가르치",
+        "delivery",
+        ">=",
+        4.0,
+    ),
+]
+
+# 매칭된 표현 바로 뒤(같은 어절이나 다음 어절)가 "~지 않", "~지 못", "못"이면
+# 뜻이 반대가 되므로 사용하지 않음. "학점이 낮지 않은"처럼 어느 쪽인지 알 수 없는
+# 부정은 반대 조건으로 바꾸지 않고 건너뜀 (명시적으로 처리하는 부정형은 위의 패턴에)
+_NOT_NEGATED = r"(?!\S*\s*\S*?(지\s*(는\s*)?(않|못)|못))"
+_COMPILED_PATTERNS = [
+    (re.compile(rf"(?:{pattern}){_NOT_NEGATED}"), column, op, value)
+    for pattern, column, op, value in CONSTRAINT_PATTERNS
+]
+
+# "어렵더라도", "학점 낮아도 괜찮은"처럼 양보하는 절은 조건이 아니므로 제외
+CONCESSIVE_PATTERN = re.compile(r"(?:더라도|아도|어도|여도|해도|지만)(?=[\s,]|$)")
+
+
+def parse_constraints(review_queries: Sequence[str]) -> List[StatPredicate]:
+    """
+    Turn recognizable 평가관련 sub-queries into numeric ReviewStat predicates.
+
+    e.g. "교수님이 학점을 잘주시는 수업" -> grade >= 3.5
+    """
+    predicates: Dict[str, StatPredicate] = {}
+    for query in review_queries:
+        # 마지막 양보절 뒤의 주절만 사용
+        query = CONCESSIVE_PATTERN.split(query)[-1]
+        for pattern, column, op, value in _COMPILED_PATTERNS:
+            if column not in predicates and pattern.search(query):
+                predicates[column] = StatPredicate(column, op, value)
+    return list(predicates.values())
+
+
+class ReviewStatFilter:
+    """
+    In-memory copy of review_stat, one float column per statistic (NaN when a
+    course has no review_stat), used to restrict the candidate courses.
+    """
+
+    def __init__(self, course_ids: Sequence[str], stats: Dict[str, np.ndarray]):
+        self.course_ids = np.array(list(course_ids), dtype=object)
+        self.stats = stats
+
+    @classmethod
+    def from_collection(cls, course_collection) -> "ReviewStatFilter":
+        result = course_collection.get(include=["metadatas"])
+        return cls.from_metadatas(result["ids"], result["metadatas"])
+
+    @classmethod
+    def from_metadatas(
+        cls, course_ids: Sequence[str], metadatas: Sequence[Optional[Dict]]
+    ) -> "ReviewStatFilter":
+        filled = [metadata or {} for metadata in metadatas]
+        stats = {
+            column: np.array(
+                [metadata.get(f"stat_{column}", np.nan) for metadata in filled],
+                dtype=np.float64,
+            )
+            for column in REVIEW_STAT_COLUMNS
+        }
+        return cls(course_ids, stats)
+
+    def allowed_course_ids(
+        self, predicates: Sequence[StatPredicate]
+    ) -> Optional[Set[str]]:
+        """
+        Course ids that satisfy every predicate, or None when nothing can be
+        filtered (no predicates, or an index built without review_stat).
+        """
+        predicates = [
+            predicate
+            for predicate in predicates
+            if not np.isnan(self.stats[predicate.column]).all()
+        ]
+        if not predicates:
+            return None
+
+        mask = np.ones(len(self.course_ids), dtype=bool)
+        for predicate in predicates:
+            # 통계가 없는 수업은 NaN이라 비교 결과가 False → 제외됨
+            column = self.stats[predicate.column]
+            if predicate.op == ">=":
+                mask &= column >= predicate.value
+            else:
+                mask &= column <= predicate.value
+        return set(self.course_ids[mask].tolist())
@@ -0,0 +1,87 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+class ReviewReranker:
+    """
+    Exact cosine search over the review sentences of a few candidate courses.
+
+    Sentence embeddings are stored grouped by ``course_id`` in one contiguous
+    matrix, so the sentences of the candidate courses can be scored with a
+    single matrix multiply instead of a filtered HNSW query.
+    """
+
+    def __init__(
+        self, ids: Sequence[str], course_ids: Sequence[str], embeddings: np.ndarray
+    ):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2:
+            # review_sentence가 비어 있으면 (0,) 배열이 들어옴
+            embeddings = embeddings.reshape(len(ids), -1 if len(ids) else 0)
+        order = np.argsort(np.asarray(course_ids, dtype=object), kind="stable")
+        embeddings = embeddings[order]
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.embeddings = embeddings / np.maximum(norms, 1e-12)
+        self.ids = [ids[i] for i in order.tolist()]
+        self.course_ids = [course_ids[i] for i in order.tolist()]
+
+        self.offsets: Dict[str, slice] = {}
+        start = 0
+        for i in range(1, len(self.course_ids) + 1):
+            if (
+                i == len(self.course_ids)
+                or self.course_ids[i] != self.course_ids[start]
+            ):
+                self.offsets[self.course_ids[start]] = slice(start, i)
+                start = i
+
+    @classmethod
+    def from_collection(cls, collection) -> "ReviewReranker":
+        result = collection.get(include=["embeddings", "metadatas"])
+        embeddings = result["embeddings"]
+        return cls(
+            ids=result["ids"],
+            course_ids=[metadata["course_id"] for metadata in result["metadatas"]],
+            embeddings=np.asarray(
+                [] if embeddings is None else embeddings, dtype=np.float32
+            ),
+        )
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        course_ids: Sequence[str],
+        n_results: int = 256,
+    ) -> Dict[str, List[List]]:
+        """
+        Same result shape as ``collection.query`` with cosine distances.
+        """
+        slices = [self.offsets[i] for i in course_ids if i in self.offsets]
+        if not slices or not len(query_embeddings):
+            return {
+                "ids": [[] for _ in query_embeddings],
+                "distances": [[] for _ in query_embeddings],
+                "metadatas": [[] for _ in query_embeddings],
+            }
+        rows = np.concatenate([np.arange(s.start, s.stop) for s in slices])
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(
+            len(query_embeddings), -1
+        )
+        queries = queries / np.maximum(
+            np.linalg.norm(queries, axis=1, keepdims=True), 1e-12
+        )
+        distances = 1 - queries @ self.embeddings[rows].T
+
+        result: Dict[str, List[List]] = {"ids": [], "distances": [], "metadatas": []}
+        for row_distances in distances:
+            top = np.argsort(row_distances, kind="stable")[:n_results]
+
+            hits = rows[top].tolist()
+            result["ids"].append([self.ids[i] for i in hits])
+            result["distances"].append(row_distances[top].tolist())
+            result["metadatas"].append(
+                [{"course_id": self.course_ids[i]} for i in hits]
+            )
+        return result
@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from vector_db.utils import preprocess_text
+
+SPLIT_KEYS = ("주제관련", "평가관련")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query with the same rules used for the indexed sentences.
+    """
+    return preprocess_text(query)
+
+
+def validate_split_output(output: str) -> bool:
+    """
+    Check that the splitter output parses into the json shape the pipeline reads.
+    """
+    try:
+        parsed = json.loads(output)
+    except (TypeError, ValueError):
+        return False
+
+    if not isinstance(parsed, dict):
+        return False
+    for key in SPLIT_KEYS:
+        if not isinstance(parsed.get(key), list):
+            return False
+        if not all(isinstance(sentence, str) for sentence in parsed[key]):
+            return False
+    return True
+
+
+class SplitCache:
+    """
+    LRU cache for QuerySplitter outputs, optionally backed by a SQLite file.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 100000,
+        ttl: Optional[float] = 60 * 60 * 24 * 30,
+    ):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS split_cache ("
+                "query TEXT PRIMARY KEY, output TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS split_cache_accessed_at "
+                "ON split_cache (accessed_at)"
+            )
+            self._conn.commit()
+
+    def get(self, query: str) -> Optional[str]:
+        key = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._is_expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            entry = self._get_from_disk(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            output, created_at = entry
+            self._put_in_memory(key, output, created_at)
+            self.hits += 1
+            return output
+
+    def put(self, query: str, output: str) -> bool:
+        if not validate_split_output(output):
+            return False
+
+        key = normalize_query(query)
+        now = time.time()
+
+        with self._lock:
+            self._put_in_memory(key, output, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO split_cache VALUES (?, ?, ?, ?)",
+                    (key, output, now, now),
+                )
+                self._evict_from_disk(now)
+                self._conn.commit()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM split_cache")
+                self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _put_in_memory(self, key: str, output: str, created_at: float):
+        self._memory[key] = (output, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_from_disk(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute(
+            "SELECT output, created_at FROM split_cache WHERE query = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        output, created_at = row
+        if self._is_expired(created_at, now):
+            self._conn.execute("DELETE FROM split_cache WHERE query = ?", (key,))
+            self._conn.commit()
+            return None
+
+        self._conn.execute(
+            "UPDATE split_cache SET accessed_at = ? WHERE query = ?", (now, key)
+        )
+        self._conn.commit()
+        return output, created_at
+
+    def _evict_from_disk(self, now: float):
+        assert self._conn is not None
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM split_cache WHERE created_at < ?", (now - self.ttl,)
+            )
+        self._conn.execute(
+            "DELETE FROM split_cache WHERE query NOT IN ("
+            "SELECT query FROM split_cache ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_disk_entries,),
+        )
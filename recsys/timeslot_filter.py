@@ -0,0 +1,40 @@
+from typing import Dict, Optional, Sequence, Set
+
+import numpy as np
+
+from db.timeslot import parse_timeslot
+
+
+class TimeslotFilter:
+    """
+    Weekday x period bitmask of every course in one uint64 array, so checking
+    all courses against a timetable is a single vectorized AND.
+    """
+
+    def __init__(self, course_ids: Sequence[str], masks: np.ndarray):
+        self.course_ids = np.array(list(course_ids), dtype=object)
+        self.masks = np.asarray(masks, dtype=np.uint64)
+
+    @classmethod
+    def from_metadatas(
+        cls, course_ids: Sequence[str], metadatas: Sequence[Optional[Dict]]
+    ) -> "TimeslotFilter":
+        masks = []
+        for metadata in metadatas:
+            metadata = metadata or {}
+            # timeslot_mask가 없는 예전 인덱스는 timeslot 문자열에서 계산
+            mask = metadata.get("timeslot_mask")
+            if mask is None:
+                mask = parse_timeslot(metadata.get("timeslot", ""))
+            masks.append(mask)
+        return cls(course_ids, np.array(masks, dtype=np.uint64))
+
+    def allowed_course_ids(self, exclude_mask: int) -> Optional[Set[str]]:
+        """
+        Course ids that do not use any slot in ``exclude_mask``, or None when
+        there is nothing to exclude.
+        """
+        if not exclude_mask:
+            return None
+        conflict = self.masks & np.uint64(exclude_mask)
+        return set(self.course_ids[conflict == 0].tolist())
@@ -0,0 +1,168 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Set
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from crawler_sugang import Crawler
+from db.db_manager import DBMananger
+from db.models import Course
+
+COURSE_ROW = (
+    "<tr><td></td><td>{course_no}</td><td>00</td><td>전공필수</td>"
+    "<td>컴퓨터학과</td><td>{course_no} 과목</td><td>김교수</td><td>3(3)</td>"
+    "<td>월(1-2) 애기능생활관 201</td></tr>"
+)
+
+
+def syllabus_page(course_no: str) -> str:
+    # parse_syllabus_page가 읽는 위치에 맞춘 최소한의 강의계획서 페이지
+    tables = ["<table></table>"] * 38
+    tables[29 - 2] = (
+        "<table><tbody><tr><td></td></tr><tr><td>선수과목 없음</td></tr>"
+        "<tr><td></td></tr><tr><td>C 언어</td></tr></tbody></table>"
+    )
+    tables[39 - 2] = (
+        "<table><tbody><tr><td>1주</td><td>"
+        f"{course_no} 소개</td></tr><tr><td>2주</td><td>프로세스</td></tr>"
+        "</tbody></table>"
+    )
+    return (
+        '<html><body><div><div class="page"><form>'
+        '<div class="bottom_view"><table></table><table></table><table><tbody>'
+        f"<tr><td></td></tr><tr><td>{course_no} 소개</td></tr>"
+        "</tbody></table></div>" + "".join(tables) + "</form></div></div></body></html>"
+    )
+
+
+class SyllabusServer(ThreadingHTTPServer):
+    failing: Set[str] = set()
+    malformed: Set[str] = set()
+
+
+class SyllabusHandler(BaseHTTPRequestHandler):
+    server: SyllabusServer
+
+    def do_GET(self):
+        course_no = parse_qs(urlsplit(self.path).query)["cour_cd"][0]
+        if course_no in self.server.failing:
+            self.send_error(404)
+            return
+        if course_no in self.server.malformed:
+            body = b"<html><body>Maintenance</body></html>"
+        else:
+            body = syllabus_page(course_no).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = SyllabusServer(("127.0.0.1", 0), SyllabusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def crawl(tmp_path, server, course_nos, cache=False):
+    page_path = tmp_path / "page_source.html"
+    page_path.write_text(
+        "".join(COURSE_ROW.format(course_no=no) for no in course_nos),
+        encoding="utf-8",
+    )
+    host, port = server.server_address
+    crawler = Crawler(
+        str(page_path),
+        db_path=str(tmp_path / "course.db"),
+        requests_per_second=0,
+        parse_workers=1,
+        syllabus_url_template=f"http://{host}:{port}/syllabus?cour_cd={{course_no}}"
+        "&cour_cls={course_class}&dept_cd={dept_code}",
+        cache_path=str(tmp_path / "cache.sqlite") if cache else None,
+    )
+    crawler.crawl()
+    crawler.fetcher.close()
+    return crawler
+
+
+def read_courses(tmp_path):
+    db = DBMananger(str(tmp_path / "course.db"))
+    with Session(db.engine) as session:
+        return {
+            course.course_no: course for course in session.scalars(select(Course)).all()
+        }
+
+
+def test_crawl_loads_syllabus_details(tmp_path, server):
+    crawler = crawl(tmp_path, server, ["COSE101", "COSE102"])
+
+    courses = read_courses(tmp_path)
+    assert crawler.stats["fetched"] == 2
+    assert courses["COSE101"].course_intro == "COSE101 소개"
+    assert courses["COSE101"].prerequisite == "선수과목 없음\nC 언어"
+    assert courses["COSE102"].syllabus == "1주: COSE102 소개\n2주: 프로세스\n"
+    assert courses["COSE102"].timeslot == "월(1-2)"
+
+
+def test_failed_fetch_keeps_existing_details(tmp_path, server):
+    crawl(tmp_path, server, ["COSE101", "COSE102"])
+
+    # 캐시 없이 다시 크롤링할 때 COSE102, COSE103 강의계획서를 불러오지 못함
+    server.failing = {"COSE102", "COSE103"}
+    crawler = crawl(tmp_path, server, ["COSE101", "COSE102", "COSE103"])
+
+    courses = read_courses(tmp_path)
+    assert crawler.stats["failed"] == 2
+    assert courses["COSE101"].syllabus == "1주: COSE101 소개\n2주: 프로세스\n"
+    assert courses["COSE102"].course_intro == "COSE102 소개"
+    assert courses["COSE102"].syllabus == "1주: COSE102 소개\n2주: 프로세스\n"
+    # 처음 보는 수업은 강의계획서 없이라도 추가됨
+    assert courses["COSE103"].course_name == "COSE103 과목"
+    assert courses["COSE103"].syllabus is None
+
+
+def test_malformed_page_keeps_existing_details(tmp_path, server):
+    crawl(tmp_path, server, ["COSE101", "COSE102"], cache=True)
+
+    # 200이지만 강의계획서 형식이 아닌 페이지
+    server.malformed = {"COSE102", "COSE103"}
+    crawler = crawl(tmp_path, server, ["COSE101", "COSE102", "COSE103"], cache=True)
+
+    courses = read_courses(tmp_path)
+    assert crawler.stats["failed"] == 2
+    assert crawler.failed_urls == {
+        crawler.syllabus_url({"course_no": "COSE103", "course_class": "00"})
+    }
+    assert courses["COSE102"].syllabus == "1주: COSE102 소개\n2주: 프로세스\n"
+    assert courses["COSE103"].course_name == "COSE103 과목"
+    assert courses["COSE103"].syllabus is None
+
+
+def test_unchanged_pages_use_cached_details(tmp_path, server):
+    crawl(tmp_path, server, ["COSE101", "COSE102"], cache=True)
+
+    crawler = crawl(tmp_path, server, ["COSE101", "COSE102"], cache=True)
+
+    courses = read_courses(tmp_path)
+    # ETag가 같으면 304를 받고 parsing과 DB 저장을 건너뜀
+    assert crawler.stats["fetched"] == 0
+    assert crawler.stats["unchanged"] == 2
+    assert crawler.stats["written"] == 0
+    assert courses["COSE101"].syllabus == "1주: COSE101 소개\n2주: 프로세스\n"
@@ -0,0 +1,138 @@
+import sqlite3
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db.db_manager import DBMananger
+from db.models import Course, Review, ReviewStat
+
+STAT = {
+    "satisfaction": 4.0,
+    "workload": 3.0,
+    "difficulty": 3.0,
+    "delivery": 4.0,
+    "achievement": 4.0,
+    "grade": 3.0,
+    "attendance": 2.0,
+}
+
+
+def course(course_no: str, course_name: str = "운영체제") -> dict:
+    return {
+        "course_name": course_name,
+        "course_no": course_no,
+        "course_class": "00",
+        "department": "컴퓨터학과",
+        "credit": 3,
+        "course_type": "전공선택",
+        "instructor": "김교수",
+    }
+
+
+def review_ids(db: DBMananger) -> dict:
+    with Session(db.engine) as session:
+        return {
+            review.text: review.id for review in session.scalars(select(Review)).all()
+        }
+
+
+def test_replace_reviews_keeps_ids_of_unchanged_reviews(tmp_path):
+    db = DBMananger(str(tmp_path / "course.db"), init_db=True)
+    db.upsert_courses([course("COSE341")])
+
+    db.save_reviews({1: [{"text": "좋아요"}, {"text": "과제가 많아요"}]}, {1: STAT})
+    before = review_ids(db)
+
+    db.save_reviews({1: [{"text": "과제가 많아요"}, {"text": "추천"}]}, {1: STAT})
+    after = review_ids(db)
+
+    assert set(after) == {"과제가 많아요", "추천"}
+    assert after["과제가 많아요"] == before["과제가 많아요"]
+
+
+def test_replace_reviews_keeps_reviews_with_the_same_text(tmp_path):
+    db = DBMananger(str(tmp_path / "course.db"), init_db=True)
+    db.upsert_courses([course("COSE341")])
+
+    db.save_reviews({1: [{"text": "좋아요"}, {"text": "좋아요"}]}, {1: STAT})
+    with Session(db.engine) as session:
+        first = session.scalars(select(Review.id).order_by(Review.id)).all()
+    assert len(first) == 2
+
+    db.save_reviews({1: [{"text": "좋아요"}, {"text": "추천"}]}, {1: STAT})
+    with Session(db.engine) as session:
+        reviews = session.scalars(select(Review).order_by(Review.id)).all()
+        assert [r.text for r in reviews] == ["좋아요", "추천"]
+        assert reviews[0].id == first[0]
+
+
+def make_legacy_db(path: str) -> DBMananger:
+    DBMananger(path, init_db=True)
+    # 유니크 인덱스가 생기기 전의 DB처럼 인덱스를 지우고 중복 row를 넣음
+    connection = sqlite3.connect(path)
+    for index in (
+        "ix_course_course_no_course_class",
+        "ix_review_course_id_text_occurrence",
+        "ix_review_stat_course_id",
+    ):
+        connection.execute(f"DROP INDEX {index}")
+    connection.commit()
+    connection.close()
+
+    db = DBMananger(path)
+    # 예전 크롤러는 다시 크롤링할 때마다 수업 row를 새로 추가함
+    db.create_courses([Course(**course("COSE341", "운영체제(구)"))])
+    db.create_courses([Course(**course("COSE101", "자료구조"))])
+    db.create_courses([Course(**course("COSE341"))])
+    with Session(db.engine) as session:
+        session.add_all(
+            [
+                Review(course_id=1, text="예전 강의평"),
+                Review(course_id=3, text="좋아요"),
+                Review(course_id=3, text="좋아요"),
+                ReviewStat(course_id=1, **STAT),
+                ReviewStat(course_id=3, **dict(STAT, grade=5.0)),
+            ]
+        )
+        session.commit()
+    return db
+
+
+def test_init_db_does_not_modify_duplicate_rows(tmp_path, capsys):
+    path = str(tmp_path / "course.db")
+    db = make_legacy_db(path)
+
+    DBMananger(path, init_db=True)
+
+    assert "Run DBMananger.migrate()" in capsys.readouterr().out
+    with Session(db.engine) as session:
+        assert len(session.scalars(select(Course)).all()) == 3
+        assert len(session.scalars(select(Review)).all()) == 3
+
+
+def test_migrate_keeps_the_latest_course_row(tmp_path):
+    path = str(tmp_path / "course.db")
+    db = make_legacy_db(path)
+
+    db.migrate()
+
+    with Session(db.engine) as session:
+        courses = session.scalars(select(Course).order_by(Course.id)).all()
+        assert [(c.id, c.course_name) for c in courses] == [
+            (2, "자료구조"),
+            (3, "운영체제"),
+        ]
+        reviews = session.scalars(select(Review).order_by(Review.id)).all()
+        assert [(r.course_id, r.text, r.occurrence) for r in reviews] == [
+            (3, "좋아요", 0),
+            (3, "좋아요", 1),
+        ]
+        stats = session.scalars(select(ReviewStat)).all()
+        assert [(s.course_id, s.grade) for s in stats] == [(3, 5.0)]
+
+    # 인덱스가 만들어졌으므로 upsert가 다시 동작
+    db.upsert_courses([course("COSE341", "운영체제(신)")])
+    with Session(db.engine) as session:
+        assert session.scalars(
+            select(Course.course_name).where(Course.id == 3)
+        ).one() == ("운영체제(신)")
@@ -0,0 +1,51 @@
+import numpy as np
+
+from vector_db.embedding_cache import DiskEmbeddingTier
+
+
+def test_rows_follow_committed_count(tmp_path):
+    tier = DiskEmbeddingTier(str(tmp_path), dim=4)
+    tier.put_many(["a", "b"], np.ones((2, 4)))
+
+    # 다른 프로세스가 쓰다가 죽어서 row 중간까지만 파일에 남은 경우
+    with open(tier.vector_path, "ab") as f:
+        f.write(b"\0" * 6)
+
+    reopened = DiskEmbeddingTier(str(tmp_path), dim=4)
+    assert len(reopened) == 2
+    assert reopened.matrix.nbytes == 2 * reopened.row_bytes
+    assert reopened.matrix.shape == (2, 4)
+
+    reopened.put_many(["c"], np.full((1, 4), 3.0))
+    assert reopened.get_rows(["a", "b", "c"]) == {"a": 0, "b": 1, "c": 2}
+    np.testing.assert_array_equal(reopened.get_many(["c"])["c"], np.full(4, 3.0))
+
+
+def test_interrupted_write_is_overwritten(tmp_path):
+    tier = DiskEmbeddingTier(str(tmp_path), dim=4)
+    tier.put_many(["a"], np.ones((1, 4)))
+    # commit되지 않은 row 전체가 남아 있어도 다음 쓰기가 그 자리를 사용
+    with open(tier.vector_path, "ab") as f:
+        f.write(np.zeros((1, 4), dtype=np.float32).tobytes())
+
+    other = DiskEmbeddingTier(str(tmp_path), dim=4)
+    tier.put_many(["b"], np.full((1, 4), 2.0))
+    assert other.get_rows(["a", "b"]) == {"a": 0, "b": 1}
+    np.testing.assert_array_equal(other.get_many(["b"])["b"], np.full(4, 2.0))
+
+
+def test_buffered_writes_are_flushed_in_batches(tmp_path):
+    tier = DiskEmbeddingTier(str(tmp_path), dim=4, flush_rows=3)
+    other = DiskEmbeddingTier(str(tmp_path), dim=4)
+
+    tier.put_many(["a", "b"], np.ones((2, 4)))
+    # flush 전에는 이 프로세스에서만 보임
+    np.testing.assert_array_equal(tier.get_many(["a"])["a"], np.ones(4))
+    assert other.get_rows(["a", "b"]) == {}
+
+    tier.put_many(["c"], np.full((1, 4), 3.0))
+    assert other.get_rows(["a", "b", "c"]) == {"a": 0, "b": 1, "c": 2}
+
+    tier.put_many(["d"], np.full((1, 4), 4.0))
+    tier.close()
+    np.testing.assert_array_equal(other.get_many(["d"])["d"], np.full(4, 4.0))
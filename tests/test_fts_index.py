@@ -0,0 +1,65 @@
+import pytest
+
+from db.db_manager import DBMananger
+from db.fts_index import LexicalIndex, lexical_terms
+
+COURSES = [
+    {
+        "course_no": "COSE341",
+        "course_name": "운영체제",
+        "course_intro": "프로세스와 스레드, 메모리 관리를 배운다",
+        "syllabus": "1주: 운영체제 개요\n2주: 프로세스",
+    },
+    {
+        "course_no": "COSE474",
+        "course_name": "딥러닝",
+        "course_intro": "신경망과 역전파를 배운다",
+        "syllabus": "1주: 퍼셉트론\n2주: PyTorch 실습",
+    },
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "course.db")
+    db = DBMananger(path, init_db=True)
+    db.upsert_courses(
+        [
+            dict(
+                course,
+                course_class="00",
+                department="컴퓨터학과",
+                credit=3,
+                course_type="전공선택",
+                instructor="김교수",
+            )
+            for course in COURSES
+        ]
+    )
+    return path
+
+
+def test_lexical_terms_drop_particles_and_short_words():
+    assert lexical_terms("PyTorch를 쓰는 딥러닝 수업") == ["PyTorch", "딥러닝"]
+    assert lexical_terms("COSE341 운영체제를 배우는 수업") == ["COSE341", "운영체제"]
+
+
+def test_search_course_code_and_rare_terms(db_path):
+    DBMananger(db_path).build_fts_index()
+    index = LexicalIndex(db_path)
+
+    exact = index.search(["COSE474 듣고 싶어요"])
+    assert exact.exact and exact.course_ids == ["2"]
+
+    result = index.search(["운영체제 수업"])
+    assert result.course_ids == ["1"] and result.strong and not result.exact
+
+    assert index.search(["운영체제"], allowed_course_ids={"2"}).course_ids == []
+
+
+def test_missing_fts_table_disables_lexical_retrieval(db_path, tmp_path):
+    index = LexicalIndex(db_path)
+    assert not index.available
+    assert index.search(["운영체제"]).course_ids == []
+
+    assert not LexicalIndex(str(tmp_path / "missing.db")).available
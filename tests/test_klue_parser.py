@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from klue_parser import KLUEParseError, parse_klue_page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "klue")
+
+
+def read_page(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parse_saved_page():
+    reviews, review_stat = parse_klue_page(read_page("COSE341 김교수"))
+
+    assert reviews == [
+        {
+            "text": "운영체제 개념을 차근차근 설명해 주십니다.\n과제가 많지만 남는 게 많아요."
+        },
+        {"text": "시험이 어렵습니다."},
+        {"text": "출석은 가끔 부르십니다.\n추천해요"},
+    ]
+    assert review_stat == {
+        "satisfaction": 4.3,
+        "attendance": 3.0,
+        "workload": 3.8,
+        "difficulty": 3.5,
+        "delivery": 4.6,
+        "achievement": 4.1,
+        "grade": 4.3,
+    }
+
+
+def test_malformed_reviews_are_skipped():
+    reviews, review_stat = parse_klue_page(read_page("COSE222 이교수"))
+
+    # 학점이 없는 강의평과 모르는 학점 표기의 강의평은 건너뜀
+    assert reviews == [{"text": "학점을 잘 주십니다."}, {"text": "무난한 수업"}]
+    assert review_stat["grade"] == 3.0
+    assert review_stat["attendance"] == 2.0
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("<span>종종함</span>", "<span>모름</span>"),
+        ("<span>4.3</span>", "<span>-</span>"),
+        ("<span>3.8</span>", ""),
+    ],
+)
+def test_malformed_stats_raise_parse_error(old, new):
+    page = read_page("COSE341 김교수")
+    assert page.count(old) == 1
+
+    with pytest.raises(KLUEParseError):
+        parse_klue_page(page.replace(old, new))
+
+
+def test_page_without_reviews_raises_parse_error():
+    page = read_page("COSE341 김교수").replace("'기대 이상'", "'비공개'")
+    page = page.replace("'보통'", "'비공개'")
+
+    with pytest.raises(KLUEParseError, match="no reviews"):
+        parse_klue_page(page)
+
+    with pytest.raises(KLUEParseError, match="review list not found"):
+        parse_klue_page("<html><body><div id='root'></div></body></html>")
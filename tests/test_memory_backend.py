@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from vector_db.memory_backend import MemoryClient, save_snapshot
+
+
+class FakeCollection:
+    def __init__(self, ids, embeddings):
+        self.ids = ids
+        self.embeddings = embeddings
+        self.metadata = {"hnsw:space": "cosine"}
+
+    def get(self, include):
+        return {
+            "ids": self.ids,
+            "embeddings": self.embeddings,
+            "documents": [f"doc {id}" for id in self.ids],
+            "metadatas": [{"course_id": id} for id in self.ids],
+        }
+
+
+def test_snapshot_with_empty_review_collections(tmp_path):
+    # KLUE 크롤링 전에는 review collection이 비어 있음
+    collections = {
+        "course": FakeCollection(["1", "2"], [[1.0, 0.0], [0.0, 1.0]]),
+        "review": FakeCollection([], []),
+        "review_sentence": FakeCollection([], None),
+    }
+    client = SimpleNamespace(get_collection=lambda name: collections[name])
+    path = str(tmp_path / "snapshot.npz")
+
+    save_snapshot(client, path, names=list(collections))
+    loaded = MemoryClient.from_snapshot(path)
+
+    review = loaded.get_collection("review")
+    assert review.count() == 0
+    assert review.embeddings.shape == (0, 2)
+    assert loaded.get_collection("review_sentence").embeddings.shape == (0, 2)
+    assert review.query(query_embeddings=[[1.0, 0.0]], n_results=3) == {
+        "ids": [[]],
+        "distances": [[]],
+        "metadatas": [[]],
+        "documents": [[]],
+    }
+    result = loaded.get_collection("course").query(
+        query_embeddings=[[1.0, 0.0]], n_results=1
+    )
+    assert result["ids"] == [["1"]]
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from recsys.review_filter import ReviewStatFilter, StatPredicate, parse_constraints
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("교수님이 학점을 잘주시는 수업", [("grade", ">=")]),
+        ("학점을 잘 안 주는 수업", [("grade", "<=")]),
+        ("학점이 짜게 나오는 수업", [("grade", "<=")]),
+        ("출석을 부르지 않는 수업", [("attendance", "<=")]),
+        ("출석 체크를 안 하는 수업", [("attendance", "<=")]),
+        ("출석을 매번 부르는 수업", [("attendance", ">=")]),
+        ("과제가 많지 않은 수업", [("workload", "<=")]),
+        ("과제가 많은 수업", [("workload", ">=")]),
+        ("꿀강 추천", [("workload", "<=")]),
+        ("시험이 어렵지 않은 수업", [("difficulty", "<=")]),
+        ("수업이 어려운 편", [("difficulty", ">=")]),
+        ("난이도가 높은 수업", [("difficulty", ">=")]),
+        ("쉬운 수업", [("difficulty", "<=")]),
+        ("교수님이 강의력이 좋은 수업", [("delivery", ">=")]),
+        ("교수님이 잘 가르치는 수업", [("delivery", ">=")]),
+        # 평가가 아닌 표현
+        ("쉽게 설명해 주시는 수업", []),
+        ("어려운 개념을 쉽게 풀어주는 교수님", []),
+        ("교수님이 친절한 수업", []),
+        # 양보절
+        ("어렵더라도 배울 게 많은 수업", []),
+        ("학점 낮아도 괜찮은 수업", []),
+        ("과제가 많아도 학점을 잘 주는 수업", [("grade", ">=")]),
+        ("수업이 어렵지만 출석을 안 부르는 수업", [("attendance", "<=")]),
+    ],
+)
+def test_parse_constraints(query, expected):
+    predicates = parse_constraints([query])
+    assert [(p.column, p.op) for p in predicates] == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "학점을 잘 주지 않는 수업",
+        "학점이 좋지 않은",
+        "학점이 후하지 않은",
+        "학점이 낮지 않은 수업",
+        "난이도가 높지 않은 수업",
+        "강의력이 좋지 않은 수업",
+        "설명을 잘 못하는 교수님",
+        "잘 가르치지 못하는 교수님",
+        "출석을 매번 부르지는 않는 수업",
+        "과제가 적당한 수업",
+    ],
+)
+def test_negated_phrases_do_not_become_the_opposite_filter(query):
+    # 반대 조건으로 거르면 사용자가 원한 수업이 빠지므로 아예 조건을 만들지 않음
+    assert parse_constraints([query]) == []
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("출석을 자주 하지는 않는 수업", [("attendance", "<=")]),
+        ("과제가 적은 수업", [("workload", "<=")]),
+        (
+            "학점을 잘 주고 출석을 부르지 않는 수업",
+            [("grade", ">="), ("attendance", "<=")],
+        ),
+    ],
+)
+def test_negation_only_affects_its_own_phrase(query, expected):
+    predicates = parse_constraints([query])
+    assert [(p.column, p.op) for p in predicates] == expected
+
+
+def test_first_matching_pattern_wins_per_column():
+    predicates = parse_constraints(["학점을 잘 주는 수업", "학점이 낮은 수업"])
+    assert predicates == [StatPredicate("grade", ">=", 3.5)]
+
+
+def test_allowed_course_ids():
+    stat_filter = ReviewStatFilter.from_metadatas(
+        ["1", "2", "3"],
+        [{"stat_grade": 4.0}, {"stat_grade": 2.0}, None],
+    )
+
+    assert stat_filter.allowed_course_ids([]) is None
+    assert stat_filter.allowed_course_ids([StatPredicate("grade", ">=", 3.5)]) == {"1"}
+    # 통계가 하나도 없는 컬럼은 거르지 않음
+    assert np.isnan(stat_filter.stats["attendance"]).all()
+    assert (
+        stat_filter.allowed_course_ids([StatPredicate("attendance", "<=", 2.0)]) is None
+    )
@@ -0,0 +1,33 @@
+import numpy as np
+
+from recsys.review_reranker import ReviewReranker
+
+
+def test_query_scores_only_candidate_courses():
+    reranker = ReviewReranker(
+        ids=["a", "b", "c"],
+        course_ids=["2", "1", "2"],
+        embeddings=np.array([[1, 0], [1, 0], [0, 1]], dtype=np.float32),
+    )
+
+    result = reranker.query([[1.0, 0.0]], course_ids=["2"], n_results=2)
+
+    assert result["ids"] == [["a", "c"]]
+    assert result["distances"] == [[0.0, 1.0]]
+    assert result["metadatas"] == [[{"course_id": "2"}, {"course_id": "2"}]]
+
+
+def test_empty_collection_and_empty_queries():
+    reranker = ReviewReranker(ids=[], course_ids=[], embeddings=np.array([]))
+
+    assert reranker.embeddings.shape[0] == 0
+    assert reranker.query([[1.0, 0.0]], course_ids=["1"]) == {
+        "ids": [[]],
+        "distances": [[]],
+        "metadatas": [[]],
+    }
+    assert reranker.query([], course_ids=["1"]) == {
+        "ids": [],
+        "distances": [],
+        "metadatas": [],
+    }
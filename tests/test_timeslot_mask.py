@@ -0,0 +1,21 @@
+import pandas as pd
+
+from db.timeslot import parse_timeslot
+from vector_db.utils import course_timeslot_mask
+
+
+def test_mask_survives_float_column():
+    mask = parse_timeslot("월(1-2) 토(9-10)")
+    # None이 섞인 정수 컬럼은 float64가 되어 낮은 비트(월요일)를 잃음
+    course_df = pd.DataFrame(
+        [
+            {"timeslot": "월(1-2) 토(9-10)", "timeslot_mask": mask},
+            {"timeslot": "화(3)", "timeslot_mask": None},
+        ]
+    )
+    assert int(course_df["timeslot_mask"][0]) != mask
+
+    rows = [row for _, row in course_df.iterrows()]
+    assert course_timeslot_mask(rows[0]) == mask
+    assert course_timeslot_mask(rows[1]) == parse_timeslot("화(3)")
+    assert course_timeslot_mask({"timeslot_mask": mask}) == mask
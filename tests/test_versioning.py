@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from vector_db.versioning import VersionPointer, versioned_name
+
+NAMES = ["course", "review"]
+
+
+class FakeClient:
+    def __init__(self, versions):
+        self.names = {versioned_name(name, v) for v in versions for name in NAMES}
+
+    def list_collections(self):
+        return [SimpleNamespace(name=name) for name in sorted(self.names)]
+
+    def delete_collection(self, name):
+        self.names.remove(name)
+
+    def versions(self):
+        return sorted({name.split("__")[1] for name in self.names})
+
+
+def test_unpublished_leftovers_do_not_push_out_the_previous_version(tmp_path):
+    pointer = VersionPointer(str(tmp_path))
+    pointer.publish("v1")
+    pointer.publish("v2")
+    # v3는 중간에 죽은 빌드, v5는 아직 빌드 중
+    client = FakeClient(["v1", "v2", "v3", "v4", "v5"])
+    pointer.publish("v4")
+
+    deleted = pointer.delete_old_versions(client, NAMES, keep=2)
+
+    assert deleted == ["v1", "v3"]
+    assert client.versions() == ["v2", "v4", "v5"]
+    assert pointer.current() == "v4"
+    assert pointer.published() == ["v1", "v2", "v4"]
+
+
+def test_pointer_without_history(tmp_path):
+    pointer = VersionPointer(str(tmp_path))
+    assert pointer.current() is None
+    assert pointer.published() == []
+
+    (tmp_path / "CURRENT").write_text('{"version": "v1", "published_at": 0}')
+    assert pointer.published() == ["v1"]
+    pointer.publish("v2")
+    assert pointer.published() == ["v1", "v2"]
@@ -0,0 +1,132 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+_worker_model = None
+
+
+def _init_worker(model_name: str, n_threads: Optional[int], model=None):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # 프로세스마다 스레드 수를 제한해서 코어를 나눠 쓰도록
+    if n_threads:
+        torch.set_num_threads(n_threads)
+    _worker_model = (
+        model if model is not None else SentenceTransformer(model_name, device="cpu")
+    )
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    assert _worker_model is not None
+    return _worker_model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+
+class BuildEmbedder:
+    """
+    Build-time embedding engine.
+
+    Texts are sorted by token length and cut into batches of similar length to
+    minimise padding. Batches are spread over a process pool and the vectors
+    are put back in the original order.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        n_workers: int = 1,
+        n_threads_per_worker: Optional[int] = None,
+        batch_size: int = 64,
+        chunk_size: int = 8192,
+    ):
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.n_workers = n_workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if n_workers > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(model_name, n_threads_per_worker or 1),
+            )
+        else:
+            # worker가 하나면 EmbedGenerator가 올린 fp32 모델을 같이 씀
+            from vector_db.embed_generator import EmbedGenerator
+
+            shared = None
+            if model_name == EmbedGenerator.MODEL_NAME:
+                shared = EmbedGenerator.fp32_model()
+            _init_worker(model_name, n_threads_per_worker, model=shared)
+
+        self.stats = {"n_texts": 0, "seconds": 0.0}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        chunks = list(self.iter_encode(texts))
+        if not chunks:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(chunks)
+
+    def iter_encode(self, texts: List[str]) -> Iterator[np.ndarray]:
+        """
+        Yield embeddings chunk by chunk, each chunk in the original text order.
+        """
+        for start in range(0, len(texts), self.chunk_size):
+            chunk = texts[start : start + self.chunk_size]
+            started_at = time.perf_counter()
+            yield self._encode_chunk(chunk)
+
+            self.stats["n_texts"] += len(chunk)
+            self.stats["seconds"] += time.perf_counter() - started_at
+            print(
+                f"Embedded {self.stats['n_texts']}/{len(texts)} sentences "
+                f"({self.sentences_per_sec:.1f} sentences/sec)"
+            )
+
+    @property
+    def sentences_per_sec(self) -> float:
+        if not self.stats["seconds"]:
+            return 0.0
+        return self.stats["n_texts"] / self.stats["seconds"]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _encode_chunk(self, texts: List[str]) -> np.ndarray:
+        lengths = [
+            len(ids)
+            for ids in self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        ]
+        order = np.argsort(lengths, kind="stable")
+        batches = [
+            order[i : i + self.batch_size]
+            for i in range(0, len(order), self.batch_size)
+        ]
+
+        output: Optional[np.ndarray] = None
+        if self.pool is None:
+            results = (
+                (batch, _encode_batch([texts[i] for i in batch])) for batch in batches
+            )
+        else:
+            futures = {
+                self.pool.submit(_encode_batch, [texts[i] for i in batch]): batch
+                for batch in batches
+            }
+            results = ((futures[f], f.result()) for f in as_completed(futures))
+
+        for batch, vectors in results:
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[batch] = vectors
+        assert output is not None
+        return output
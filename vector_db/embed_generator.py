@@ -1,10 +1,99 @@
+from typing import Any, Dict, Optional
+
 from sentence_transformers import SentenceTransformer
 from chromadb import Documents, EmbeddingFunction, Embeddings
 
+from vector_db.embedding_cache import EmbeddingCache
+from vector_db.quantization import (
+    GUARD_SENTENCES,
+    INFERENCE_MODES,
+    OnnxEncoder,
+    accuracy_guard,
+    quantize_dynamic_int8,
+)
+
 
 class EmbedGenerator(EmbeddingFunction):
     MODEL_NAME = "jhgan/ko-sroberta-multitask"
-    model = SentenceTransformer(MODEL_NAME)
+    ONNX_PATH = "vector_db/onnx/ko-sroberta-multitask.onnx"
+    # fp32 모델은 fp32 모드나 fallback에서 처음 필요할 때 한 번만 올림
+    _model: Optional[SentenceTransformer] = None
+    _encoders: Dict[str, Any] = {}
+
+    def __init__(
+        self,
+        use_cache: bool = False,
+        cache_path: Optional[str] = None,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        inference_mode: str = "fp32",
+    ):
+        self.inference_mode = inference_mode
+        self.encoder = self._get_encoder(inference_mode)
+
+        # 서빙 시에만 캐시를 켜고, 인덱스 빌드 시에는 기본값(캐시 없음)을 사용
+        self.cache = None
+        if use_cache:
+            namespace = self.MODEL_NAME
+            if self.inference_mode != "fp32":
+                namespace += f":{self.inference_mode}"
+            self.cache = EmbeddingCache(
+                dim=self.encoder.get_sentence_embedding_dimension(),
+                max_bytes=cache_max_bytes,
+                disk_path=cache_path,
+                namespace=namespace,
+            )
 
     def __call__(self, input: Documents) -> Embeddings:
-        return self.model.encode(input).tolist()
+        if self.cache is not None:
+            return self.cache.encode(input, self.encoder.encode).tolist()
+        return self.encoder.encode(input).tolist()
+
+    @classmethod
+    def fp32_model(cls) -> SentenceTransformer:
+        """
+        The shared fp32 SentenceTransformer, loaded on first use.
+        """
+        if cls._model is None:
+            cls._model = SentenceTransformer(cls.MODEL_NAME)
+        return cls._model
+
+    def _get_encoder(self, inference_mode: str):
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode: {inference_mode}")
+        if inference_mode == "fp32":
+            return self.fp32_model()
+
+        # 양자화/ONNX 모델은 프로세스당 한 번만 만들고 fp32 모델과 비교해서 검증
+        if inference_mode not in self._encoders:
+            self._encoders[inference_mode] = self._build_encoder(inference_mode)
+
+        encoder = self._encoders[inference_mode]
+        if encoder is self._model:
+            self.inference_mode = "fp32"
+        return encoder
+
+    @classmethod
+    def _build_encoder(cls, inference_mode: str):
+        # fp32 모델을 새로 올려서 가드의 기준 벡터만 계산한 뒤, int8은 그 모델을
+        # 그대로 양자화하고 ONNX는 export에만 사용 -> 가드가 끝나면 fp32는 해제됨
+        model = SentenceTransformer(cls.MODEL_NAME, device="cpu")
+        reference = model.encode(GUARD_SENTENCES)
+        try:
+            if inference_mode == "int8":
+                encoder = quantize_dynamic_int8(model)
+            else:
+                encoder = OnnxEncoder(
+                    model, cls.ONNX_PATH, quantize=inference_mode == "onnx-int8"
+                )
+            report = accuracy_guard(lambda sentences: reference, encoder.encode)
+        except Exception as error:
+            # onnx/onnxruntime이 없거나 export/양자화에 실패해도 가드 실패처럼 fp32로
+            print(f"{inference_mode} encoder could not be built: {error!r}")
+            report = {"passed": False}
+        else:
+            print(f"{inference_mode} accuracy guard: {report}")
+        del model
+        if not report["passed"]:
+            print(f"{inference_mode} failed the accuracy guard, using fp32")
+            return cls.fp32_model()
+        return encoder
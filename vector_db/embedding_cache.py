@@ -0,0 +1,277 @@
+import atexit
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from vector_db.utils import text_hash
+
+
+class DiskEmbeddingTier:
+    """
+    Append-only embedding matrix on disk, read through np.memmap.
+
+    Vectors are appended to ``vectors.<dtype>`` and their row is recorded in
+    ``index.sqlite`` so that other processes can map the same file.
+
+    Appends hold the SQLite write lock (``BEGIN IMMEDIATE``) and commit the
+    new row count together with the keys, so concurrent writers never share
+    rows and bytes past the committed count (an interrupted write) are ignored
+    and cut off on the next open.
+
+    With ``flush_rows`` > 0 new vectors are buffered and written (with a single
+    fsync and commit) once that many are pending, by ``flush()``/``close()``,
+    or at interpreter exit, which keeps disk latency off the serving path.
+    """
+
+    def __init__(self, path: str, dim: int, dtype=np.float32, flush_rows: int = 0):
+        os.makedirs(path, exist_ok=True)
+        self.dim = dim
+        self.flush_rows = flush_rows
+        self._pending: Dict[str, np.ndarray] = {}
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = self.dtype.itemsize * dim
+        self.vector_path = os.path.join(path, f"vectors.{self.dtype.name}")
+        self.conn = sqlite3.connect(
+            os.path.join(path, "index.sqlite"), check_same_thread=False, timeout=60
+        )
+        with self._write_lock():
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_index "
+                "(key TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_rows (n_rows INTEGER NOT NULL)"
+            )
+            if not os.path.exists(self.vector_path):
+                open(self.vector_path, "wb").close()
+            size = os.path.getsize(self.vector_path)
+            n_rows = self._committed_rows()
+            if n_rows is None:
+                # row 수를 기록하기 전에 만든 store는 파일에 온전히 쓰인 row까지 사용
+                n_rows = size // self.row_bytes
+                self.conn.execute("INSERT INTO embedding_rows VALUES (?)", (n_rows,))
+            if size > n_rows * self.row_bytes:
+                # commit되지 않은 (중간에 끊긴) 쓰기는 잘라냄
+                os.truncate(self.vector_path, n_rows * self.row_bytes)
+
+        self._remap()
+        if flush_rows:
+            atexit.register(self.flush)
+
+    def __len__(self):
+        return self._n_rows
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        Read-only memmap of every stored vector (shared page cache, no copy).
+        """
+        return self._matrix
+
+    def get_rows(self, keys: List[str]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(
+                self.conn.execute(
+                    f"SELECT key, row FROM embedding_index WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            )
+
+        if rows and max(rows.values()) >= self._n_rows:
+            # 다른 프로세스가 파일 뒤에 벡터를 추가한 경우
+            self._remap()
+        return {key: row for key, row in rows.items() if row < self._n_rows}
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {
+            key: self._pending[key].astype(np.float32)
+            for key in keys
+            if key in self._pending
+        }
+        found.update(
+            (key, np.array(self._matrix[row], dtype=np.float32))
+            for key, row in self.get_rows(
+                [key for key in keys if key not in found]
+            ).items()
+        )
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        if not self.flush_rows:
+            self._write(keys, vectors)
+            return
+
+        # 서빙 중에는 모아서 한 번에 씀 (miss마다 fsync하지 않음)
+        self._pending.update(zip(keys, vectors))
+        if len(self._pending) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        vectors = np.stack([self._pending[key] for key in keys])
+        self._write(keys, vectors)
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.flush_rows:
+            atexit.unregister(self.flush)
+        self.conn.close()
+
+    def _write(self, keys: List[str], vectors: np.ndarray):
+        with self._write_lock():
+            # 파일 크기가 아니라 commit된 row 수 뒤에 씀 (끊긴 쓰기는 덮어씀)
+            start = self._committed_rows() or 0
+            with open(self.vector_path, "r+b") as f:
+                f.seek(start * self.row_bytes)
+                f.write(vectors.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embedding_index VALUES (?, ?)",
+                [(key, start + i) for i, key in enumerate(keys)],
+            )
+            self.conn.execute(
+                "UPDATE embedding_rows SET n_rows = ?", (start + len(keys),)
+            )
+        self._remap()
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        # BEGIN IMMEDIATE는 다른 프로세스의 쓰기가 끝날 때까지 기다림
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+
+    def _committed_rows(self) -> Optional[int]:
+        found = self.conn.execute("SELECT n_rows FROM embedding_rows").fetchone()
+        return None if found is None else found[0]
+
+    def _remap(self):
+        n_rows = self._committed_rows() or 0
+        self._n_rows = n_rows
+        self._matrix = (
+            np.memmap(
+                self.vector_path, dtype=self.dtype, mode="r", shape=(n_rows, self.dim)
+            )
+            if n_rows
+            else np.empty((0, self.dim), dtype=self.dtype)
+        )
+
+
+class EmbeddingCache:
+    """
+    LRU cache of text embeddings with a byte budget and an optional disk tier.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        namespace: str = "",
+        disk_flush_rows: int = 256,
+    ):
+        self.dim = dim
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self.namespace = namespace
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._n_bytes = 0
+        self._disk = (
+            DiskEmbeddingTier(disk_path, dim, flush_rows=disk_flush_rows)
+            if disk_path
+            else None
+        )
+        self._lock = threading.Lock()
+
+    def encode(
+        self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        keys = [text_hash(self.namespace + text) for text in texts]
+
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            if self._disk is not None:
+                not_in_memory = [key for key in dict.fromkeys(keys) if key not in found]
+                for key, vector in self._disk.get_many(not_in_memory).items():
+                    self._put_in_memory(key, vector)
+                    found[key] = vector
+
+        # 캐시에 없는 문장만 한 번에 인코딩
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            with self._lock:
+                if self._disk is not None:
+                    self._disk.put_many(list(missing), vectors)
+                for key, vector in zip(missing, vectors):
+                    self._put_in_memory(key, vector)
+                    found[key] = vector
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if not keys:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def flush(self):
+        """
+        Write the vectors buffered for the disk tier.
+        """
+        if self._disk is not None:
+            with self._lock:
+                self._disk.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._n_bytes,
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+            }
+
+    def _put_in_memory(self, key: str, vector: np.ndarray):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+
+        self._memory[key] = vector
+        self._n_bytes += vector.nbytes
+        while self._n_bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._n_bytes -= evicted.nbytes
@@ -0,0 +1,94 @@
+import json
+import os
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from vector_db.embedding_cache import DiskEmbeddingTier
+from vector_db.utils import text_hash
+
+
+class EmbeddingStore(DiskEmbeddingTier):
+    """
+    Append-only embedding store that lives outside Chroma.
+
+    Vectors are keyed by the hash of (model name, text), so re-creating a
+    collection (new ``hnsw:space``, new backend, ...) reads them back instead
+    of re-encoding. The ``ids`` table remembers which row each collection id
+    points to, for processes that want to map the vectors directly.
+    """
+
+    def __init__(self, path: str, model_name: str, dim: int, dtype=np.float16):
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["model_name"] != model_name or meta["dim"] != dim:
+                raise ValueError(
+                    f"Embedding store at {path} was built with {meta['model_name']}"
+                )
+            dtype = meta["dtype"]
+
+        super().__init__(path, dim, dtype=dtype)
+        self.model_name = model_name
+        with open(meta_path, "w") as f:
+            json.dump(
+                {"model_name": model_name, "dim": dim, "dtype": self.dtype.name}, f
+            )
+
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ids (collection TEXT NOT NULL, "
+            "id TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (collection, id))"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def text_key(self, text: str) -> str:
+        return text_hash(self.model_name + "\0" + text)
+
+    def encode(
+        self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Vectors for ``texts`` in order; only texts missing from the store are
+        passed to ``encode_fn`` (once each) and then appended.
+        """
+        keys = [self.text_key(text) for text in texts]
+        rows = self.get_rows(list(set(keys)))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in rows}
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            self.put_many(list(missing), encode_fn(list(missing.values())))
+            rows = self.get_rows(list(set(keys)))
+
+        return np.asarray(self.matrix[[rows[key] for key in keys]], dtype=np.float32)
+
+    def put_ids(self, collection: str, ids: List[str], texts: List[str]):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO ids VALUES (?, ?, ?)",
+            [(collection, id, self.text_key(text)) for id, text in zip(ids, texts)],
+        )
+        self.conn.commit()
+
+    def rows_for_ids(self, collection: str, ids: List[str]) -> Dict[str, int]:
+        """
+        Row of ``self.matrix`` for every known id of ``collection``.
+        """
+        found: Dict[str, int] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                self.conn.execute(
+                    "SELECT ids.id, embedding_index.row FROM ids "
+                    "JOIN embedding_index ON ids.key = embedding_index.key "
+                    f"WHERE ids.collection = ? AND ids.id IN ({placeholders})",
+                    [collection, *chunk],
+                ).fetchall()
+            )
+        if found and max(found.values()) >= len(self):
+            self._remap()
+        return found
@@ -0,0 +1,276 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from vector_db.versioning import versioned_name
+
+SNAPSHOT_COLLECTIONS = ("course", "course_sentence", "review", "review_sentence")
+
+
+def _as_matrix(embeddings, n_rows: int, dim: int = 0) -> np.ndarray:
+    """
+    ``embeddings`` as an (n_rows, dim) float32 matrix.
+
+    An empty collection comes back as ``[]`` (or None) which cannot be reshaped
+    with -1, so it becomes an explicit (0, dim) matrix.
+    """
+    matrix = np.asarray([] if embeddings is None else embeddings, dtype=np.float32)
+    if n_rows == 0:
+        return np.empty((0, matrix.shape[1] if matrix.ndim == 2 else dim), np.float32)
+    return matrix.reshape(n_rows, -1)
+
+
+class MemoryCollection:
+    """
+    Brute-force replacement for a Chroma collection.
+
+    Embeddings live in one (n, dim) matrix and metadata is stored column by
+    column, so ``query`` is a single matrix multiply plus a boolean mask for
+    ``where`` instead of an HNSW search followed by SQLite lookups.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[Optional[str]],
+        metadatas: Sequence[Optional[Dict]],
+        embedding_function=None,
+        space: str = "cosine",
+        dtype=np.float32,
+    ):
+        self.name = name
+        self.embedding_function = embedding_function
+        self.space = space
+
+        embeddings = _as_matrix(embeddings, len(ids))
+        if space == "cosine":
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        self.embeddings = embeddings.astype(dtype)
+        self.squared_norms = np.einsum("ij,ij->i", embeddings, embeddings)
+
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [metadata or {} for metadata in metadatas]
+        self.id_to_row = {id: row for row, id in enumerate(self.ids)}
+
+        keys = dict.fromkeys(key for metadata in self.metadatas for key in metadata)
+        self.metadata_columns = {
+            key: np.array([metadata.get(key) for metadata in self.metadatas], object)
+            for key in keys
+        }
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get(
+        self,
+        ids: Optional[Union[str, List[str]]] = None,
+        where: Optional[Dict] = None,
+        include: Sequence[str] = ("metadatas", "documents"),
+    ) -> Dict[str, List]:
+        if ids is None:
+            rows = np.arange(len(self.ids))
+        else:
+            if isinstance(ids, str):
+                ids = [ids]
+            rows = np.array(
+                [self.id_to_row[id] for id in ids if id in self.id_to_row],
+                dtype=np.int64,
+            )
+        if where:
+            rows = rows[self._where_mask(where)[rows]]
+
+        row_list = rows.tolist()
+        result: Dict[str, List] = {"ids": [self.ids[row] for row in row_list]}
+        if "documents" in include:
+            result["documents"] = [self.documents[row] for row in row_list]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[row] for row in row_list]
+        if "embeddings" in include:
+            result["embeddings"] = self.embeddings[row_list].astype(np.float32).tolist()
+        return result
+
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[List[List[float]]] = None,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Sequence[str] = ("metadatas", "documents", "distances"),
+    ) -> Dict[str, List[List]]:
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        queries = _as_matrix(query_embeddings, len(query_embeddings))
+
+        rows = np.arange(len(self.ids))
+        if where:
+            rows = rows[self._where_mask(where)]
+        distances = self._distances(queries, rows)
+
+        result: Dict[str, List[List]] = {
+            "ids": [],
+            "distances": [],
+            "metadatas": [],
+            "documents": [],
+        }
+        for row_distances in distances:
+            if len(rows) > n_results:
+                top = np.argpartition(row_distances, n_results - 1)[:n_results]
+            else:
+                top = np.arange(len(rows))
+            top = top[np.argsort(row_distances[top], kind="stable")]
+
+            hits = rows[top].tolist()
+            result["ids"].append([self.ids[row] for row in hits])
+            result["distances"].append(row_distances[top].tolist())
+            result["metadatas"].append([self.metadatas[row] for row in hits])
+            result["documents"].append([self.documents[row] for row in hits])
+
+        return {
+            key: value
+            for key, value in result.items()
+            if key == "ids" or key in include
+        }
+
+    def _distances(self, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        # hnswlib과 같은 거리 정의 (cosine: 1 - cos, ip: 1 - dot, l2: 제곱 거리)
+        if not len(rows) or not len(queries):
+            # 빈 collection은 차원을 모를 수 있으므로 곱하지 않음
+            return np.zeros((len(queries), len(rows)), dtype=np.float32)
+        matrix = self.embeddings[rows].astype(np.float32, copy=False)
+        if self.space == "cosine":
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            return 1 - (queries / np.maximum(norms, 1e-12)) @ matrix.T
+        if self.space == "ip":
+            return 1 - queries @ matrix.T
+        return (
+            np.einsum("ij,ij->i", queries, queries)[:, None]
+            - 2 * queries @ matrix.T
+            + self.squared_norms[rows][None, :]
+        )
+
+    def _where_mask(self, where: Dict) -> np.ndarray:
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub_where in condition:
+                    mask &= self._where_mask(sub_where)
+            elif key == "$or":
+                sub_mask = np.zeros(len(self.ids), dtype=bool)
+                for sub_where in condition:
+                    sub_mask |= self._where_mask(sub_where)
+                mask &= sub_mask
+            else:
+                mask &= self._condition_mask(key, condition)
+        return mask
+
+    def _condition_mask(self, key: str, condition) -> np.ndarray:
+        column = self.metadata_columns.get(key)
+        if column is None:
+            return np.zeros(len(self.ids), dtype=bool)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = np.ones(len(self.ids), dtype=bool)
+        for operator, value in condition.items():
+            if operator == "$eq":
+                mask &= column == value
+            elif operator == "$ne":
+                mask &= column != value
+            elif operator in ("$in", "$nin"):
+                values = set(value)
+                found = np.fromiter((v in values for v in column), bool, len(column))
+                mask &= found if operator == "$in" else ~found
+            elif operator in ("$gt", "$gte", "$lt", "$lte"):
+                compare = {
+                    "$gt": np.greater,
+                    "$gte": np.greater_equal,
+                    "$lt": np.less,
+                    "$lte": np.less_equal,
+                }[operator]
+                present = np.array([v is not None for v in column], dtype=bool)
+                result = np.zeros(len(column), dtype=bool)
+                result[present] = compare(column[present].astype(float), value)
+                mask &= result
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+        return mask
+
+
+class MemoryClient:
+    """
+    Serves collections from a snapshot file with the Chroma client calls the
+    pipeline uses.
+    """
+
+    def __init__(self, collections: Dict[str, MemoryCollection]):
+        self.collections = collections
+
+    @classmethod
+    def from_snapshot(cls, path: str, dtype=np.float32) -> "MemoryClient":
+        collections = {}
+        with np.load(path, allow_pickle=False) as snapshot:
+            names = snapshot["collections"].tolist()
+            for name in names:
+                collections[name] = MemoryCollection(
+                    name=name,
+                    ids=snapshot[f"{name}/ids"].tolist(),
+                    embeddings=snapshot[f"{name}/embeddings"],
+                    documents=json.loads(str(snapshot[f"{name}/documents"])),
+                    metadatas=json.loads(str(snapshot[f"{name}/metadatas"])),
+                    space=str(snapshot[f"{name}/space"]),
+                    dtype=dtype,
+                )
+        return cls(collections)
+
+    def get_collection(self, name: str, embedding_function=None, **kwargs):
+        collection = self.collections[name]
+        if embedding_function is not None:
+            collection.embedding_function = embedding_function
+        return collection
+
+    def get_or_create_collection(self, name: str, embedding_function=None, **kwargs):
+        return self.get_collection(name, embedding_function=embedding_function)
+
+
+def save_snapshot(
+    chroma_client,
+    path: str,
+    names: Sequence[str] = SNAPSHOT_COLLECTIONS,
+    version: Optional[str] = None,
+):
+    """
+    Dump Chroma collections (embeddings, documents, metadatas) into one .npz file.
+
+    With ``version`` the versioned collections are read but stored under their
+    plain names. The file is replaced atomically so a serving process never
+    loads a half-written snapshot.
+    """
+    arrays: Dict[str, Any] = {"collections": np.array(list(names))}
+    dim = 0
+    for name in names:
+        collection = chroma_client.get_collection(versioned_name(name, version))
+        result = collection.get(include=["embeddings", "documents", "metadatas"])
+        # 빈 collection (예: KLUE 크롤링 전의 review)은 앞 collection의 차원을 씀
+        embeddings = _as_matrix(result["embeddings"], len(result["ids"]), dim)
+        dim = embeddings.shape[1] or dim
+        arrays[f"{name}/ids"] = np.array(result["ids"], dtype=str)
+        arrays[f"{name}/embeddings"] = embeddings
+        arrays[f"{name}/documents"] = np.array(
+            json.dumps(result["documents"], ensure_ascii=False)
+        )
+        arrays[f"{name}/metadatas"] = np.array(
+            json.dumps(result["metadatas"], ensure_ascii=False)
+        )
+        arrays[f"{name}/space"] = np.array(
+            (collection.metadata or {}).get("hnsw:space", "l2")
+        )
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
@@ -0,0 +1,166 @@
+import os
+from typing import Callable, List
+
+import numpy as np
+
+INFERENCE_MODES = ("fp32", "int8", "onnx", "onnx-int8")
+
+# fp32 모델과 비교할 때 쓰는 held-out 문장 (인덱스에 없는 문장들)
+GUARD_SENTENCES = [
+    "인공지능과 관련된 수업",
+    "딥러닝 관련 내용을 배우는 수업",
+    "교수님이 학점을 잘주시는 수업",
+    "출석을 부르지 않는 수업",
+    "과제가 많지만 얻어가는 것이 많은 수업",
+    "운영체제의 프로세스와 스레드를 다루는 수업",
+    "시험이 어렵고 학점이 짜게 나옴",
+    "강의력이 좋아서 이해가 잘 됨",
+    "PyTorch로 신경망을 직접 구현하는 과제",
+    "중간고사",
+    "팀 프로젝트 비중이 높은 수업",
+    "교수님이 질문에 친절하게 답해주심",
+]
+
+
+def quantize_dynamic_int8(model):
+    """
+    Convert the Linear layers of a SentenceTransformer to dynamic int8 in
+    place (no fp32 copy is kept) and return it.
+    """
+    import torch
+
+    return torch.quantization.quantize_dynamic(
+        model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+class OnnxEncoder:
+    """
+    Runs the transformer of a SentenceTransformer as an ONNX graph on CPU and
+    applies the same mean pooling, so ``encode`` matches ``model.encode``.
+    """
+
+    def __init__(self, model, onnx_path: str, quantize: bool = False):
+        import onnxruntime as ort
+
+        pooling = model[1]
+        if not pooling.get_pooling_mode_str() == "mean":
+            raise ValueError("OnnxEncoder only supports mean pooling")
+
+        # fp32 모델 대신 tokenizer와 설정만 가지고 있어서 모델은 해제될 수 있음
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self.dim = model.get_sentence_embedding_dimension()
+
+        if not os.path.exists(onnx_path):
+            export_onnx(model, onnx_path)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            quantized_path = onnx_path.replace(".onnx", ".int8.onnx")
+            if not os.path.exists(quantized_path):
+                quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+            onnx_path = quantized_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            onnx_path, options, providers=["CPUExecutionProvider"]
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences: List[str], batch_size: int = 32, **kwargs):
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(
+                sentences[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            mask = inputs["attention_mask"].astype(np.int64)
+            (hidden,) = self.session.run(
+                ["last_hidden_state"],
+                {
+                    "input_ids": inputs["input_ids"].astype(np.int64),
+                    "attention_mask": mask,
+                },
+            )
+            mask = mask[..., None].astype(np.float32)
+            outputs.append(
+                (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            )
+
+        if not outputs:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(outputs).astype(np.float32)
+
+
+def export_onnx(model, onnx_path: str):
+    import torch
+
+    class _Transformer(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask)[
+                0
+            ]
+
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+    dummy = model.tokenizer(["샘플 문장입니다"], return_tensors="pt")
+    torch.onnx.export(
+        _Transformer(model[0].auto_model.to("cpu").eval()),
+        (dummy["input_ids"], dummy["attention_mask"]),
+        onnx_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+    )
+
+
+def accuracy_guard(
+    reference_encode: Callable[[List[str]], np.ndarray],
+    candidate_encode: Callable[[List[str]], np.ndarray],
+    sentences: List[str] = GUARD_SENTENCES,
+    min_cosine: float = 0.99,
+    max_similarity_error: float = 0.02,
+) -> dict:
+    """
+    Compare a quantized encoder with the fp32 one on held-out sentences.
+
+    Checks both the cosine between each pair of vectors and how much the
+    sentence-to-sentence similarity matrix (what retrieval ranks by) moves.
+    """
+    reference = _normalize(np.asarray(reference_encode(sentences), np.float32))
+    candidate = _normalize(np.asarray(candidate_encode(sentences), np.float32))
+
+    cosine = np.einsum("ij,ij->i", reference, candidate)
+    similarity_error = np.abs(reference @ reference.T - candidate @ candidate.T)
+    report = {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "max_similarity_error": float(similarity_error.max()),
+    }
+    report["passed"] = (
+        report["min_cosine"] >= min_cosine
+        and report["max_similarity_error"] <= max_similarity_error
+    )
+    return report
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
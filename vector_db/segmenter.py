@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from vector_db.utils import text_hash
+
+
+def _split_chunk(texts: List[str]) -> List[List[str]]:
+    from kss import split_sentences
+
+    return [split_sentences(text) for text in texts]
+
+
+class SentenceSegmenter:
+    """
+    ``kss.split_sentences`` over a process pool, memoized on disk by text hash.
+
+    Unchanged reviews and syllabi are never re-segmented on later builds. The
+    pool is kept for the segmenter's lifetime (each worker imports kss once),
+    so call ``close`` when done.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        n_workers: int = 1,
+        chunk_size: int = 64,
+    ):
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if n_workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=n_workers)
+
+        self.conn = None
+        if cache_path is not None:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(cache_path)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS segmentation "
+                "(key TEXT PRIMARY KEY, sentences TEXT NOT NULL)"
+            )
+            self.conn.commit()
+
+    def split(self, texts: List[str]) -> List[List[str]]:
+        """
+        Same output as ``[split_sentences(text) for text in texts]``.
+        """
+        keys = [text_hash(str(text)) for text in texts]
+        found = self._get_cached(list(set(keys)))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing_texts = list(missing.values())
+            chunks = [
+                missing_texts[i : i + self.chunk_size]
+                for i in range(0, len(missing_texts), self.chunk_size)
+            ]
+            if self.pool is not None and len(chunks) > 1:
+                results = list(self.pool.map(_split_chunk, chunks))
+            else:
+                results = [_split_chunk(chunk) for chunk in chunks]
+
+            segmented = dict(
+                zip(missing, (sentences for chunk in results for sentences in chunk))
+            )
+            self._put_cached(segmented)
+            found.update(segmented)
+
+        return [list(found[key]) for key in keys]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _get_cached(self, keys: List[str]) -> dict:
+        if self.conn is None:
+            return {}
+
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, sentences in self.conn.execute(
+                f"SELECT key, sentences FROM segmentation WHERE key IN ({placeholders})",
+                chunk,
+            ):
+                found[key] = json.loads(sentences)
+        return found
+
+    def _put_cached(self, segmented: dict):
+        if self.conn is None:
+            return
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO segmentation VALUES (?, ?)",
+            [
+                (key, json.dumps(sentences, ensure_ascii=False))
+                for key, sentences in segmented.items()
+            ],
+        )
+        self.conn.commit()
@@ -1,5 +1,10 @@
+import hashlib
+import json
+import math
 import re
 
+from db.timeslot import parse_timeslot
+
 
 def preprocess_text(text):
     # 한글, 영문, 숫자를 제외한 모든 문자 및 특수 문자 제거
@@ -22,3 +27,69 @@ def extract_prefix(text):
 
 def remove_prefix(string):
     return re.sub(r"^\d+:\s*", "", string)
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(*parts):
+    # 문서와 metadata가 같으면 같은 hash → 증분 빌드 시 다시 임베딩하지 않음
+    return text_hash(json.dumps(parts, ensure_ascii=False, sort_keys=True))
+
+
+def sentence_ids(parent_ids, sentences):
+    """
+    Stable ids for sentences: parent id + sentence hash + occurrence number.
+
+    Unlike DataFrame positions, these do not shift when a row is inserted.
+    """
+    ids = []
+    seen: dict = {}
+    for parent_id, sentence in zip(parent_ids, sentences):
+        key = (str(parent_id), text_hash(str(sentence))[:16])
+        ids.append(f"{key[0]}-{key[1]}-{seen.get(key, 0)}")
+        seen[key] = seen.get(key, 0) + 1
+    return ids
+
+
+def course_info(course):
+    # 수업 개요 + 선수과목 + 강의계획서
+    return "\n".join(
+        str(course[key])
+        for key in ("course_intro", "prerequisite", "syllabus")
+        if isinstance(course.get(key), str) and course.get(key)
+    )
+
+
+REVIEW_STAT_COLUMNS = (
+    "satisfaction",
+    "workload",
+    "difficulty",
+    "delivery",
+    "achievement",
+    "grade",
+    "attendance",
+)
+
+
+def review_stat_metadata(review_stat):
+    # Chroma metadata에는 None을 넣을 수 없으므로 review_stat이 없는 수업은 key를 생략
+    if not isinstance(review_stat, dict):
+        return {}
+    return {
+        f"stat_{key}": float(review_stat[key])
+        for key in REVIEW_STAT_COLUMNS
+        if review_stat.get(key) is not None
+    }
+
+
+def course_timeslot_mask(course):
+    # 예전에 크롤링한 수업은 timeslot_mask가 없으므로 timeslot 문자열에서 계산
+    # float64로 바뀐 mask는 2**53 이상의 비트(토요일)가 틀릴 수 있으므로 역시 다시 계산
+    mask = course.get("timeslot_mask")
+    if mask is None or isinstance(mask, float):
+        timeslot = course.get("timeslot")
+        if timeslot or mask is None or math.isnan(mask):
+            return parse_timeslot(str(timeslot or ""))
+    return int(mask)
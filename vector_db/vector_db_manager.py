@@ -1,35 +1,151 @@
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional, Set
+
 import chromadb
 import numpy as np
 import pandas as pd
 from chromadb.config import Settings
-from kss import split_sentences
-from utils import extract_prefix, preprocess_text, remove_prefix
+from utils import (
+    content_hash,
+    course_info,
+    course_timeslot_mask,
+    extract_prefix,
+    preprocess_text,
+    remove_prefix,
+    review_stat_metadata,
+    sentence_ids,
+)
 
+from db.db_manager import DBMananger
+from vector_db.build_embedder import BuildEmbedder
 from vector_db.embed_generator import EmbedGenerator
+from vector_db.embedding_cache import EmbeddingCache
+from vector_db.embedding_store import EmbeddingStore
+from vector_db.memory_backend import save_snapshot
+from vector_db.segmenter import SentenceSegmenter
+from vector_db.versioning import VersionPointer, new_version, versioned_name
+
+COLLECTIONS = ("course", "course_sentence", "review", "review_sentence")
+
+
+def keep_exact_timeslot_mask(
+    course_df: pd.DataFrame, courses: List[dict]
+) -> pd.DataFrame:
+    """
+    Put ``timeslot_mask`` of ``courses`` back into ``course_df`` as Python ints.
+
+    pandas stores an int column with missing values as float64, which cannot
+    hold masks above 2**53 (the Saturday bits) exactly.
+    """
+    if "timeslot_mask" in course_df:
+        course_df["timeslot_mask"] = pd.Series(
+            [course.get("timeslot_mask") for course in courses],
+            index=course_df.index,
+            dtype=object,
+        )
+    return course_df
+
+
+class SeenIds:
+    """
+    Ids written during a streaming build, per collection.
+
+    Kept in a temporary SQLite database (spilled to disk once it outgrows the
+    page cache) instead of Python sets, so memory does not grow with the corpus.
+    """
+
+    def __init__(self):
+        # 빈 경로는 연결을 닫으면 지워지는 임시 DB
+        self.conn = sqlite3.connect("")
+        self.conn.execute(
+            "CREATE TABLE seen (collection TEXT NOT NULL, id TEXT NOT NULL, "
+            "PRIMARY KEY (collection, id)) WITHOUT ROWID"
+        )
+
+    def add(self, collection: str, ids: List[str]):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO seen VALUES (?, ?)", [(collection, id) for id in ids]
+        )
+        self.conn.commit()
+
+    def unseen(self, collection: str, ids: List[str]) -> List[str]:
+        found: Set[str] = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                id
+                for (id,) in self.conn.execute(
+                    f"SELECT id FROM seen WHERE collection = ? AND id IN ({placeholders})",
+                    [collection, *chunk],
+                )
+            )
+        return [id for id in ids if id not in found]
+
+    def close(self):
+        self.conn.close()
 
 
 class VectorDBGenerator:
-    def __init__(self, json_path, vetor_db_path):
+    def __init__(
+        self,
+        json_path,
+        vetor_db_path,
+        incremental: bool = False,
+        n_workers: int = 1,
+        segmentation_cache_path: Optional[str] = None,
+        embedding_store_path: Optional[str] = None,
+        versioned: bool = False,
+    ):
         self.db_path = vetor_db_path
+        self.incremental = incremental
+        # versioned=True면 새 버전의 collection에 빌드하고 다 끝난 뒤에 pointer만 교체
+        # (build_from_sqlite에서만 지원)
+        self.version_pointer = VersionPointer(vetor_db_path) if versioned else None
+        self.version = new_version() if versioned else None
+        self.embedder = BuildEmbedder(EmbedGenerator.MODEL_NAME, n_workers=n_workers)
+        self.segmenter = SentenceSegmenter(
+            cache_path=segmentation_cache_path, n_workers=n_workers
+        )
+        # store가 없을 때도 chunk 사이에서 반복되는 문장은 메모리 캐시로 재사용
+        self.dedup_cache = EmbeddingCache(
+            dim=EmbedGenerator.fp32_model().get_sentence_embedding_dimension(),
+            max_bytes=256 * 1024 * 1024,
+        )
+        self.embedding_store = None
+        if embedding_store_path is not None:
+            self.embedding_store = EmbeddingStore(
+                embedding_store_path,
+                model_name=EmbedGenerator.MODEL_NAME,
+                dim=EmbedGenerator.fp32_model().get_sentence_embedding_dimension(),
+            )
         self.client = chromadb.PersistentClient(
             path=vetor_db_path,
             settings=Settings(allow_reset=True, anonymized_telemetry=False),
         )
-        self.course_df = pd.read_json(json_path)
+        self.course_df = None
+        if json_path:
+            with open(json_path, encoding="utf-8") as f:
+                courses = json.load(f)
+            self.course_df = keep_exact_timeslot_mask(pd.read_json(json_path), courses)
+        self.build_stats: Dict[str, dict] = {}
+        # 중복을 뺀 문장 수는 store/캐시의 miss 수로 계산 (문장 hash를 따로 모으지 않음)
+        self.dedup_texts = 0
+        # streaming build 중에는 collection별로 지금까지 쓴 id를 기록
+        self.seen_ids: Optional[SeenIds] = None
 
-    def create_course_db(self):
-        # Course
-        self.client.delete_collection(name="course")
+    def create_course_db(self, course_df: Optional[pd.DataFrame] = None):
+        if course_df is None:
+            course_df = self.course_df
+        assert course_df is not None
 
-        course_db = self.client.get_or_create_collection(
+        # Course
+        self.write_collection(
             "course",
-            embedding_function=EmbedGenerator(),
-            metadata={"hnsw:space": "cosine"},
-        )
-
-        course_db.add(
-            ids=self.course_df.id.map(str).values.tolist(),
-            documents=self.course_df["course_info"].tolist(),
+            ids=course_df.id.map(str).values.tolist(),
+            documents=course_df["course_info"].tolist(),
             metadatas=[
                 {
                     "course_id": str(row["id"]),
@@ -41,27 +157,30 @@ class VectorDBGenerator:
                     "course_type": str(row["course_type"]),
                     "instructor": str(row["instructor"]),
                     "timeslot": str(row["timeslot"]),
+                    "timeslot_mask": course_timeslot_mask(row),
                     "room": str(row["room"]),
                     "course_intro": str(row["course_intro"]),
                     "prerequisite": str(row["prerequisite"]),
                     "syllabus": str(row["syllabus"]),
+                    # 구조화된 필터(학점, 출석 등)에 쓰는 강의평 통계
+                    **review_stat_metadata(row.get("review_stat")),
                 }
-                for i, row in self.course_df.iterrows()
+                for i, row in course_df.iterrows()
             ],
         )
 
         # Course sentences
-        course_sentence_df = self.course_df[["id", "course_intro"]]
+        course_sentence_df = course_df[["id", "course_intro"]]
 
-        course_sentence_df["course_intro"] = course_sentence_df["course_intro"].map(
-            split_sentences
+        course_sentence_df["course_intro"] = self.split_sentences(
+            course_sentence_df["course_intro"]
         )
         course_sentence_df["course_intro"] = (
-            self.course_df["course_name"]
+            course_df["course_name"]
             .apply(extract_prefix)
             .map(lambda x: [x + "을 가르치는 수업"])
             + course_sentence_df["course_intro"]
-            + self.course_df["syllabus"]
+            + course_df["syllabus"]
             .str.split("\n")
             .map(lambda x: list(map(lambda y: remove_prefix(y), x)))
         )
@@ -77,16 +196,11 @@ class VectorDBGenerator:
             "course_sentence"
         ].map(preprocess_text)
 
-        self.client.delete_collection(name="course_sentence")
-
-        course_sentence_db = self.client.get_or_create_collection(
+        self.write_collection(
             "course_sentence",
-            embedding_function=EmbedGenerator(),
-            metadata={"hnsw:space": "cosine"},
-        )
-
-        course_sentence_db.add(
-            ids=course_sentence_df.index.map(str).values.tolist(),
+            ids=sentence_ids(
+                course_sentence_df["course_id"], course_sentence_df["course_sentence"]
+            ),
             documents=course_sentence_df["course_sentence"].tolist(),
             metadatas=[
                 {"course_id": str(row["course_id"])}
@@ -94,25 +208,23 @@ class VectorDBGenerator:
             ],
         )
 
-    def create_review_db(self):
+    def create_review_db(self, course_df: Optional[pd.DataFrame] = None):
+        if course_df is None:
+            course_df = self.course_df
+        assert course_df is not None
+
         # Reviews
-        review_df = self.course_df[["id", "reviews"]]
-        review_df["reviews"] = review_df["reviews"].apply(
-            lambda x: [i["text"] for i in x] if x else np.NaN
-        )
+        review_df = course_df[["id", "reviews"]]
+        review_df["reviews"] = review_df["reviews"].apply(lambda x: x if x else np.nan)
         review_df = review_df.dropna()
         review_df = review_df.explode("reviews").reset_index(drop=True)
+        # 리뷰 id는 DataFrame 위치가 아니라 DB의 id를 사용 (리뷰가 추가되어도 유지됨)
+        review_df["review_id"] = review_df["reviews"].map(lambda x: str(x["id"]))
+        review_df["reviews"] = review_df["reviews"].map(lambda x: x["text"])
 
-        self.client.delete_collection(name="review")
-
-        review_db = self.client.get_or_create_collection(
+        self.write_collection(
             "review",
-            embedding_function=EmbedGenerator(),
-            metadata={"hnsw:space": "cosine"},
-        )
-
-        review_db.add(
-            ids=review_df.index.map(str).values.tolist(),
+            ids=review_df["review_id"].tolist(),
             documents=review_df["reviews"].tolist(),
             metadatas=[
                 {
@@ -123,27 +235,24 @@ class VectorDBGenerator:
         )
 
         # Review sentences
-        self.client.delete_collection(name="review_sentences")
         review_sentence_df = review_df
-        review_sentence_df["reviews"] = review_sentence_df["reviews"].map(
-            split_sentences
+        review_sentence_df["reviews"] = self.split_sentences(
+            review_sentence_df["reviews"]
         )
-        review_sentence_df = review_sentence_df.explode("reviews").reset_index()
-        review_sentence_df.rename(
-            columns={"index": "review_id", "reviews": "review_sentence"}, inplace=True
+        review_sentence_df = review_sentence_df.explode("reviews").reset_index(
+            drop=True
         )
+        review_sentence_df.rename(columns={"reviews": "review_sentence"}, inplace=True)
 
         review_sentence_df["review_sentence"] = review_sentence_df[
             "review_sentence"
         ].map(preprocess_text)
-        review_sentence_db = self.client.get_or_create_collection(
-            "review_sentence",
-            embedding_function=EmbedGenerator(),
-            metadata={"hnsw:space": "cosine"},
-        )
 
-        review_sentence_db.add(
-            ids=review_sentence_df.index.map(str).values.tolist(),
+        self.write_collection(
+            "review_sentence",
+            ids=sentence_ids(
+                review_sentence_df["review_id"], review_sentence_df["review_sentence"]
+            ),
             documents=review_sentence_df["review_sentence"].tolist(),
             metadatas=[
                 {"course_id": str(row["id"]), "review_id": str(row["review_id"])}
@@ -151,10 +260,247 @@ class VectorDBGenerator:
             ],
         )
 
+    def split_sentences(self, texts: pd.Series) -> pd.Series:
+        # Series.map(split_sentences)와 같은 결과를 process pool + 캐시로 계산
+        return pd.Series(self.segmenter.split(texts.tolist()), index=texts.index)
+
+    def build_from_sqlite(self, db_manager: DBMananger, chunk_size: int = 256):
+        """
+        Stream courses and reviews out of SQLite chunk by chunk and segment,
+        embed and write each chunk, so peak memory does not grow with the corpus.
+        """
+        if self.version_pointer is not None:
+            self.version = new_version()
+        for name in COLLECTIONS:
+            self.prepare_collection(name)
+
+        seen_ids = SeenIds()
+        self.seen_ids = seen_ids
+        try:
+            for courses in db_manager.iter_course_dicts(chunk_size=chunk_size):
+                course_df = keep_exact_timeslot_mask(pd.DataFrame(courses), courses)
+                course_df["course_info"] = course_df.apply(course_info, axis=1)
+                self.create_course_db(course_df)
+                self.create_review_db(course_df)
+
+            if self.incremental:
+                for name in COLLECTIONS:
+                    self.delete_stale(name, seen_ids)
+        finally:
+            self.seen_ids = None
+            seen_ids.close()
+        self.publish()
+
+        for name in COLLECTIONS:
+            print(f"{name}: {self.build_stats[name]}")
+        self.build_stats["dedup"] = self.dedup_report()
+        print(f"dedup: {self.build_stats['dedup']}")
+
+    def collection_name(self, name):
+        return versioned_name(name, self.version)
+
+    def prepare_collection(self, name):
+        existing = [collection.name for collection in self.client.list_collections()]
+        if not self.incremental and self.collection_name(name) in existing:
+            self.client.delete_collection(name=self.collection_name(name))
+
+        self.build_stats[name] = {
+            "total": 0,
+            "upserted": 0,
+            "deleted": 0,
+            "unchanged": 0,
+        }
+        collection = self.client.get_or_create_collection(
+            self.collection_name(name),
+            embedding_function=EmbedGenerator(),
+            metadata={"hnsw:space": "cosine"},
+        )
+
+        # incremental 빌드는 지금 서비스 중인 버전을 복사해두고 바뀐 것만 반영
+        if self.incremental and self.version_pointer is not None:
+            current = versioned_name(name, self.version_pointer.current())
+            if current in existing and collection.count() == 0:
+                self.copy_collection(self.client.get_collection(current), collection)
+        return collection
+
+    def copy_collection(self, source, target, page_size: int = 10000):
+        offset = 0
+        while True:
+            page = source.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size,
+                offset=offset,
+            )
+            if not page["ids"]:
+                break
+            target.add(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+            )
+            offset += page_size
+
+    def publish(self, keep: int = 2):
+        """
+        Point readers at the collections of this build and drop old versions.
+        """
+        if self.version_pointer is None:
+            return
+        assert self.version is not None
+        self.version_pointer.publish(self.version)
+        deleted = self.version_pointer.delete_old_versions(
+            self.client, list(COLLECTIONS), keep=keep
+        )
+        print(f"Published {self.version} (deleted versions: {deleted})")
+
+    def write_collection(self, name, ids, documents, metadatas):
+        """
+        Write a collection from scratch, or in incremental mode only upsert the
+        ids whose content hash changed and delete the ids that disappeared.
+
+        During a streaming build only the given chunk is written; stale ids are
+        deleted once at the end.
+        """
+        for document, metadata in zip(documents, metadatas):
+            metadata["content_hash"] = content_hash(
+                EmbedGenerator.MODEL_NAME, document, metadata
+            )
+
+        streaming = self.seen_ids is not None
+        if self.seen_ids is not None:
+            collection = self.client.get_collection(self.collection_name(name))
+            self.seen_ids.add(name, ids)
+        elif self.version_pointer is not None:
+            # collection마다 따로 쓰는 경로는 언제 publish할지 알 수 없어서,
+            # 버전 collection이 publish되지 않은 채 남다가 정리되어 버림
+            raise ValueError(
+                "versioned builds are only supported through build_from_sqlite"
+            )
+        else:
+            collection = self.prepare_collection(name)
+
+        existing = {}
+        if self.incremental and (ids or not streaming):
+            result = collection.get(
+                ids=ids if streaming else None, include=["metadatas"]
+            )
+            existing = {
+                id: (metadata or {}).get("content_hash")
+                for id, metadata in zip(result["ids"], result["metadatas"])
+            }
+
+        changed = [
+            i
+            for i, id in enumerate(ids)
+            if existing.get(id) != metadatas[i]["content_hash"]
+        ]
+        stale = [] if streaming else list(existing.keys() - set(ids))
+
+        if stale:
+            collection.delete(ids=stale)
+        if changed:
+            # 임베딩은 직접 계산해서 넘김 (chunk 단위로 계산해서 바로 저장)
+            chunk_size = self.embedder.chunk_size
+            for start in range(0, len(changed), chunk_size):
+                chunk = changed[start : start + chunk_size]
+                chunk_documents = [documents[i] for i in chunk]
+                collection.upsert(
+                    ids=[ids[i] for i in chunk],
+                    embeddings=self.embed(chunk_documents).tolist(),
+                    documents=chunk_documents,
+                    metadatas=[metadatas[i] for i in chunk],
+                )
+                if self.embedding_store is not None:
+                    self.embedding_store.put_ids(
+                        name, [ids[i] for i in chunk], chunk_documents
+                    )
+
+        stats = self.build_stats[name]
+        stats["total"] += len(ids)
+        stats["upserted"] += len(changed)
+        stats["deleted"] += len(stale)
+        stats["unchanged"] += len(ids) - len(changed)
+        stats["sentences_per_sec"] = self.embedder.sentences_per_sec
+        if not streaming:
+            print(f"{name}: {stats}")
+        return collection
+
+    def embed(self, documents):
+        # 같은 문장은 한 번만 인코딩하고, 그 벡터를 해당 문장을 쓰는 모든 id에 나눠줌
+        unique_documents = list(dict.fromkeys(documents))
+        self.dedup_texts += len(documents)
+
+        # embedding store에 있는 문장은 다시 인코딩하지 않고 읽어옴
+        if self.embedding_store is not None:
+            vectors = self.embedding_store.encode(
+                unique_documents, self.embedder.encode
+            )
+        else:
+            vectors = self.dedup_cache.encode(unique_documents, self.embedder.encode)
+
+        row = {text: i for i, text in enumerate(unique_documents)}
+        return vectors[[row[text] for text in documents]]
+
+    def dedup_report(self) -> dict:
+        # 실제로 인코딩한 문장 = store(없으면 캐시)에서 찾지 못한 문장
+        n_texts = self.dedup_texts
+        encoder_cache = (
+            self.embedding_store
+            if self.embedding_store is not None
+            else self.dedup_cache
+        )
+        n_encoded = encoder_cache.misses
+        n_duplicates = n_texts - n_encoded
+        sentences_per_sec = self.embedder.sentences_per_sec
+        report = {
+            "texts": n_texts,
+            "encoded_texts": n_encoded,
+            "dedup_ratio": n_duplicates / n_texts if n_texts else 0.0,
+            "embedding_seconds_saved": (
+                n_duplicates / sentences_per_sec if sentences_per_sec else 0.0
+            ),
+        }
+        # Chroma는 id마다 벡터를 저장하므로 줄어드는 것은 embedding store뿐
+        if self.embedding_store is not None:
+            store = self.embedding_store
+            report["store_bytes_saved"] = (
+                n_duplicates * store.dim * store.dtype.itemsize
+            )
+        return report
+
+    def delete_stale(self, name, seen_ids: SeenIds, page_size: int = 10000):
+        collection = self.client.get_collection(self.collection_name(name))
+        stale = []
+        offset = 0
+        while True:
+            page = collection.get(include=[], limit=page_size, offset=offset)["ids"]
+            if not page:
+                break
+            stale += seen_ids.unseen(name, page)
+            offset += page_size
+
+        for start in range(0, len(stale), page_size):
+            collection.delete(ids=stale[start : start + page_size])
+        self.build_stats[name]["deleted"] += len(stale)
+
+    def save_snapshot(self, snapshot_path):
+        save_snapshot(self.client, snapshot_path, version=self.version)
+
 
 if __name__ == "__main__":
     vector_db_generator = VectorDBGenerator(
-        json_path="db/course_updated.json", vetor_db_path="vector_db/chroma"
+        json_path=None,
+        vetor_db_path="vector_db/chroma",
+        incremental=True,
+        n_workers=(os.cpu_count() or 1) // 2 or 1,
+        segmentation_cache_path="vector_db/segmentation_cache.sqlite",
+        embedding_store_path="vector_db/embedding_store",
+        versioned=True,
     )
-    vector_db_generator.create_course_db()
-    vector_db_generator.create_review_db()
+    db_manager = DBMananger("course.db")
+    vector_db_generator.build_from_sqlite(db_manager)
+    db_manager.build_fts_index()
+    vector_db_generator.save_snapshot("vector_db/snapshot.npz")
+    vector_db_generator.embedder.close()
+    vector_db_generator.segmenter.close()
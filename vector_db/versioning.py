@@ -0,0 +1,109 @@
+import json
+import os
+import time
+from typing import List, Optional
+
+
+def versioned_name(name: str, version: Optional[str]) -> str:
+    # version이 없으면 예전처럼 버전 없는 collection 이름을 사용
+    if version is None:
+        return name
+    return f"{name}__{version}"
+
+
+def new_version() -> str:
+    return time.strftime("v%Y%m%d%H%M%S")
+
+
+class VersionPointer:
+    """
+    Atomic "current version" pointer for versioned Chroma collections.
+
+    The builder writes ``course__<version>`` and friends next to the live ones
+    and only calls ``publish`` once every collection is complete, so readers
+    never see an empty or half-built collection.
+    """
+
+    FILE_NAME = "CURRENT"
+    # pointer 파일에 남겨두는 publish 기록 수
+    HISTORY_SIZE = 10
+
+    def __init__(self, db_path: str):
+        self.path = os.path.join(db_path, self.FILE_NAME)
+
+    def current(self) -> Optional[str]:
+        return self._read().get("version")
+
+    def published(self) -> List[str]:
+        """
+        Versions that were published here, oldest first (the current one last).
+        """
+        pointer = self._read()
+        if "history" in pointer:
+            return pointer["history"]
+        return [pointer["version"]] if "version" in pointer else []
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def publish(self, version: str):
+        history = [published for published in self.published() if published != version]
+        history = (history + [version])[-self.HISTORY_SIZE :]
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": version, "published_at": time.time(), "history": history},
+                f,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        # rename은 atomic이므로 reader는 이전 버전 아니면 새 버전만 보게 됨
+        os.replace(tmp_path, self.path)
+
+    def list_versions(self, client, names: List[str]) -> List[str]:
+        """
+        Versions that have at least one collection in ``names``, oldest first.
+        """
+        versions = set()
+        for collection in client.list_collections():
+            for name in names:
+                if collection.name.startswith(f"{name}__"):
+                    versions.add(collection.name[len(name) + 2 :])
+        return sorted(versions)
+
+    def delete_old_versions(self, client, names: List[str], keep: int = 2) -> List[str]:
+        """
+        Drop all but the ``keep`` most recently published versions, plus the
+        leftovers of builds that never got published.
+
+        The current and the previously published version are always kept, so a
+        pipeline that has not reloaded yet keeps working. Unpublished versions
+        newer than the current one may still be building and are left alone.
+        """
+        current = self.current()
+        published = self.published()
+        kept = set(published[-max(keep, 2) :])
+        old_versions = [
+            version
+            for version in self.list_versions(client, names)
+            if version not in kept
+            and (version in published or current is None or version < current)
+        ]
+        existing = {collection.name for collection in client.list_collections()}
+        for version in old_versions:
+            for name in names:
+                if versioned_name(name, version) in existing:
+                    client.delete_collection(name=versioned_name(name, version))
+        return old_versions